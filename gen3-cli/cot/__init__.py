@@ -1,9 +1,2 @@
-# Here we controll modules loading order
-# We can do it in command.__init__ but I guess this is a little bit more explicit
+# Command groups are registered in cot.command and loaded lazily on invocation
 import cot.command  # noqa
-import cot.command.generate  # noqa
-import cot.command.create  # noqa
-import cot.command.test  # noqa
-# import cot.command.add  # noqa
-import cot.command.manage  # noqa
-import cot.command.run  # noqa
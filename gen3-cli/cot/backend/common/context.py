@@ -1,6 +1,8 @@
 import os
 import string
+from cot import trace
 from .fsutils import ContextSearch, Search
+from .index import CMDBIndex
 
 
 class ContextError(Exception):
@@ -75,13 +77,21 @@ class Context:
     def search(self):
         return self.__search
 
+    @property
+    def index(self):
+        return CMDBIndex.get(
+            self.root,
+            (self.levels[name].filename for name in self.levels)
+        )
+
     def __init__(self, dir, account=None):
-        self.dir = dir
-        self.props = ContextProps()
-        self.__account = account
-        if hasattr(self, 'filename'):
-            self.__check_level_filename()
-            self.setup()
+        with trace.span('Context', 'context', level=getattr(self, 'name', None), dir=dir):
+            self.dir = dir
+            self.props = ContextProps()
+            self.__account = account
+            if hasattr(self, 'filename'):
+                self.__check_level_filename()
+                self.setup()
 
     def __check_level_filename(self):
         if not self.search.isfile(self.filename):
@@ -93,7 +103,7 @@ class Context:
             raise ValueError('Unable to find {} in {} or its parents'.format(self.levels.root.filename, self.__dir))
 
     def __try_to_set_account(self):
-        found = Search.downwards(self.root, self.levels.account.filename)
+        found = self.index.find(self.levels.account.filename)
         if not found:
             raise ContextError('No accounts found')
         selected_account = None
@@ -119,7 +129,7 @@ class Context:
                 self.account = found_accounts[0]
 
     def __try_to_set_tenant(self):
-        found = Search.downwards(self.root, self.levels.tenant.filename)
+        found = self.index.find(self.levels.tenant.filename)
         if not found:
             raise ContextError('Tenant not found')
 
@@ -220,6 +230,7 @@ class RootLevel(Context, metaclass=LevelMetaclass):
         pass
 
 
+@trace.traced('Level', 'context')
 def Level(dir):
     for level in Context.levels:
         try:
@@ -4,3 +4,22 @@ class BackendException(Exception):
 
 class UserFriendlyBackendException(BackendException):
     pass
+
+
+class ScriptException(BackendException):
+    def __init__(self, msg, returncode, result=None):
+        super().__init__(msg)
+        self.returncode = returncode
+        self.result = result
+
+
+class ScriptTimeoutException(ScriptException):
+    pass
+
+
+class ScriptCancelledException(ScriptException):
+    pass
+
+
+class WorkerException(BackendException):
+    pass
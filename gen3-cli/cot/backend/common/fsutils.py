@@ -1,4 +1,5 @@
 import os
+from cot import trace
 
 
 class Search:
@@ -11,6 +12,7 @@ class Search:
         return parts
 
     @staticmethod
+    @trace.traced('Search.exists', 'search')
     def exists(directory, name, up=0):
         if up < 0:
             raise ValueError('up parameter must be >= 0')
@@ -21,16 +23,19 @@ class Search:
         return search_path if os.path.exists(search_path) else None
 
     @staticmethod
+    @trace.traced('Search.isfile', 'search')
     def isfile(directory, name, up=0):
         filename = Search.exists(directory, name, up)
         return filename if filename is not None and os.path.isfile(filename) else None
 
     @staticmethod
+    @trace.traced('Search.isdir', 'search')
     def isdir(directory, name, up=0):
         dirname = Search.exists(directory, name, up)
         return dirname if dirname is not None and os.path.isfile(dirname) else None
 
     @staticmethod
+    @trace.traced('Search.upwards', 'search')
     def upwards(directory, name):
         parts = Search.split_path(directory)
         for up in range(len(parts)):
@@ -41,6 +46,7 @@ class Search:
         return None
 
     @staticmethod
+    @trace.traced('Search.downwards', 'search')
     def downwards(directory, name):
         found = []
         for root, dirs, files in os.walk(directory, topdown=True):
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import hashlib
+from cot import env
+
+
+class CMDBIndex:
+    """
+    On-disk index of the CMDB level files(root.json, tenant.json, account.json ...).
+
+    Index stores level files found in every directory together with the directory mtime.
+    Refresh only stats directories and lists the ones whose mtime changed,
+    adding or removing a file changes mtime of its parent directory only.
+    """
+
+    VERSION = 1
+    IGNORE_DIRS = {'.git'}
+    # seconds, a single command builds many contexts and looks the level files up for each of them
+    REFRESH_INTERVAL = 1.0
+
+    __instances = dict()
+
+    def __init__(self, root, names, filename=None):
+        self.root = root
+        self.names = sorted(set(names))
+        self.filename = filename or self.default_filename(root)
+        self.refreshed = None
+        self.__dirs = dict()
+
+    @staticmethod
+    def default_filename(root):
+        return os.path.join(
+            env.CACHE_DIR,
+            'cmdb-index',
+            '%s.json' % hashlib.sha1(root.encode('utf-8')).hexdigest()
+        )
+
+    @classmethod
+    def get(cls, root, names, max_age=None):
+        """
+        Returns index for the given root. Index file is loaded once per process,
+        index is refreshed if the last refresh is older than max_age seconds(REFRESH_INTERVAL by default),
+        so long running processes stay up to date with the CMDB changes.
+        Callers which have just changed the CMDB should pass max_age=0.
+        """
+        if max_age is None:
+            max_age = cls.REFRESH_INTERVAL
+        names = tuple(sorted(set(names)))
+        key = (root, names)
+        index = cls.__instances.get(key)
+        if index is None:
+            index = cls(root, names)
+            index.load()
+            cls.__instances[key] = index
+        if index.refreshed is None or time.monotonic() - index.refreshed >= max_age:
+            index.refresh()
+        return index
+
+    def load(self):
+        try:
+            with open(self.filename, 'rt') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION and data.get('root') == self.root and data.get('names') == self.names:
+            self.__dirs = data['dirs']
+
+    def save(self):
+        data = {
+            'version': self.VERSION,
+            'root': self.root,
+            'names': self.names,
+            'dirs': self.__dirs
+        }
+        tmp_filename = '%s.%s.tmp' % (self.filename, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            with open(tmp_filename, 'wt') as f:
+                json.dump(data, f)
+            os.replace(tmp_filename, self.filename)
+        except OSError:
+            # index is only an optimization, read-only cache dir must not break commands
+            pass
+
+    def __scan(self, path, mtime):
+        dirs = []
+        found = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name in self.names:
+                    found.append(entry.name)
+                if entry.is_dir(follow_symlinks=False) and entry.name not in self.IGNORE_DIRS:
+                    dirs.append(entry.name)
+        return {
+            'mtime': mtime,
+            'dirs': sorted(dirs),
+            'found': sorted(found)
+        }
+
+    def refresh(self):
+        # changes made during the refresh are picked up by the next one
+        self.refreshed = time.monotonic()
+        old_dirs = self.__dirs
+        new_dirs = dict()
+        changed = False
+        stack = ['']
+        while stack:
+            relpath = stack.pop()
+            path = os.path.join(self.root, relpath)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                entry = old_dirs.get(relpath)
+                if entry is None or entry['mtime'] != mtime:
+                    entry = self.__scan(path, mtime)
+                    changed = True
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            new_dirs[relpath] = entry
+            stack.extend(os.path.join(relpath, name) for name in entry['dirs'])
+        self.__dirs = new_dirs
+        if changed or len(new_dirs) != len(old_dirs):
+            self.save()
+
+    def find(self, name):
+        """
+        Same as Search.downwards(root, name) for the indexed names
+        """
+        if name not in self.names:
+            raise ValueError('{} is not indexed'.format(name))
+        return sorted(
+            os.path.join(self.root, relpath, name)
+            for relpath, entry in self.__dirs.items()
+            if name in entry['found']
+        )
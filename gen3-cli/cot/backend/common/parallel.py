@@ -0,0 +1,167 @@
+import os
+import time
+import threading
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from .exceptions import ScriptException, UserFriendlyBackendException
+
+
+TaskResult = collections.namedtuple(
+    'TaskResult',
+    [
+        'name',
+        'returncode',
+        'error',
+        'log',
+        'duration',
+        'result'
+    ],
+    # runner.ScriptResult of the task script, if any
+    defaults=(None,)
+)
+
+
+def log_filename(log_dir, name):
+    return os.path.join(log_dir, '%s.log' % name.replace(os.path.sep, '_'))
+
+
+def __locked_write(f, lock, text):
+    with lock:
+        f.write(text)
+
+
+def run_logged(name, func, log_dir, timeout=None, cancel=None, **kwargs):
+    """
+    Runs backend function capturing its output into separate log file.
+    Script failures are converted to the non zero TaskResult.returncode instead of being raised,
+    script result is kept in TaskResult.result.
+    timeout and cancel event are passed to the script runner, task is skipped if cancel is already set.
+    """
+    if cancel is not None and cancel.is_set():
+        return TaskResult(name, None, 'cancelled', None, 0)
+    log = log_filename(log_dir, name)
+    started = time.monotonic()
+    returncode = 0
+    error = None
+    result = None
+    with open(log, 'wt') as f:
+        # stdout and stderr are read by separate threads
+        write = functools.partial(__locked_write, f, threading.Lock())
+        try:
+            result = func(
+                **kwargs,
+                _on_stdout=write,
+                _on_stderr=write,
+                _timeout=timeout,
+                _cancel=cancel
+            )
+        except ScriptException as e:
+            returncode = e.returncode
+            error = str(e)
+            result = e.result
+    return TaskResult(name, returncode, error, log, time.monotonic() - started, result)
+
+
+def run_pool(tasks, workers=None, on_result=None, cancel=None):
+    """
+    Runs tasks on a bounded thread pool. Backend scripts spend their time in child processes,
+    therefore threads are enough to load all available cores.
+
+    tasks is a dict name -> callable returning TaskResult
+    on_result is called in the calling thread as soon as any task is finished
+    cancel event is set if waiting is interrupted(e.g. by KeyboardInterrupt), so running tasks can stop promptly
+    Returns results in tasks order.
+    """
+    results = dict()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(task): name
+            for name, task in tasks.items()
+        }
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if on_result is not None:
+                    on_result(result)
+        except BaseException:
+            __cancel(futures, cancel)
+            raise
+    return list(results[name] for name in tasks)
+
+
+def __cancel(futures, cancel):
+    for future in futures:
+        future.cancel()
+    if cancel is not None:
+        cancel.set()
+
+
+def sort_graph(dependencies):
+    """
+    Topologically sorts dependencies graph(name -> iterable of names).
+    Raises UserFriendlyBackendException if graph contains cycle.
+    """
+    pending = {
+        name: set(deps)
+        for name, deps in dependencies.items()
+    }
+    ordered = []
+    while pending:
+        ready = sorted(name for name, deps in pending.items() if not deps - set(ordered))
+        if not ready:
+            raise UserFriendlyBackendException(
+                'Dependency cycle between: %s' % ', '.join(sorted(pending))
+            )
+        for name in ready:
+            ordered.append(name)
+            del pending[name]
+    return ordered
+
+
+def run_graph(tasks, dependencies, workers=None, on_result=None, cancel=None):
+    """
+    Same as run_pool but a task starts only after all its dependencies succeeded.
+    Tasks depending on a failed task are skipped, skipped tasks have returncode None.
+
+    dependencies is a dict name -> iterable of names, names missing in tasks are ignored
+    """
+    pending = {
+        name: set(dep for dep in dependencies.get(name, []) if dep in tasks)
+        for name in tasks
+    }
+    sort_graph(pending)
+    results = dict()
+
+    def complete(result):
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        running = dict()
+        try:
+            while pending or running:
+                for name in sorted(pending):
+                    deps = pending[name]
+                    if not deps.issubset(results):
+                        continue
+                    del pending[name]
+                    failed = sorted(dep for dep in deps if results[dep].returncode != 0)
+                    if failed:
+                        error = 'skipped, failed dependencies: %s' % ', '.join(failed)
+                        complete(TaskResult(name, None, error, None, 0))
+                    else:
+                        running[executor.submit(tasks[name])] = name
+                if not running:
+                    # skipped tasks can make other tasks ready
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    complete(future.result()._replace(name=name))
+        except BaseException:
+            __cancel(running, cancel)
+            raise
+    return list(results[name] for name in tasks)
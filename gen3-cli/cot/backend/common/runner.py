@@ -1,7 +1,274 @@
 import os
+import sys
+import time
+import codecs
+import signal
+import asyncio
+import functools
+import threading
 import subprocess
-from cot import env
-from .exceptions import BackendException
+import collections
+from cot import env, trace
+from .exceptions import BackendException, ScriptException, ScriptTimeoutException, ScriptCancelledException
+
+
+# number of the last lines of each captured stream kept in memory
+OUTPUT_TAIL_LINES = 100
+# seconds between cancellation checks
+CANCEL_CHECK_INTERVAL = 0.1
+# seconds given to the terminated processes to exit before they are killed
+TERMINATE_TIMEOUT = 5
+# max number of bytes read from the async process stream at once
+ASYNC_READ_SIZE = 64 * 1024
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+ScriptResult = collections.namedtuple(
+    'ScriptResult',
+    [
+        'returncode',
+        'stdout',
+        'stderr',
+        'wall_time',
+        'cpu_time',
+        'max_rss'
+    ]
+)
+ScriptResult.__doc__ = """
+Result of the script run. stdout and stderr are the captured output tails(None in cli mode),
+wall_time and cpu_time(user + system) are in seconds, max_rss is in bytes.
+Resource usage includes the waited for children of the script, it is None if the script
+is run by a persistent worker or by run_async.
+"""
+
+
+class StreamCapture:
+    """
+    Drains a child process stream line by line in a separate thread.
+    Only the last lines are kept, so memory usage does not depend on the output size.
+
+    If token is provided stream is drained only up to the token, text following the token
+    on its line is kept in trailer and the stream stays open.
+    """
+
+    def __init__(self, stream, callback=None, tail=OUTPUT_TAIL_LINES, token=None):
+        self.stream = stream
+        self.callback = callback
+        self.tail = collections.deque(maxlen=tail)
+        self.error = None
+        self.token = token
+        self.trailer = None
+        self.thread = threading.Thread(target=self.__drain, daemon=True)
+
+    def __line(self, line):
+        self.tail.append(line)
+        if self.callback is not None and self.error is None:
+            try:
+                self.callback(line)
+            except Exception as e:
+                # stream must be drained anyway otherwise the child can block on a full pipe
+                self.error = e
+
+    def __drain(self):
+        try:
+            for line in iter(self.stream.readline, ''):
+                if self.token is not None:
+                    index = line.find(self.token)
+                    if index >= 0:
+                        # token follows the last line if it has no line break
+                        if index > 0:
+                            self.__line(line[:index])
+                        self.trailer = line[index + len(self.token):].strip()
+                        return
+                self.__line(line)
+        except Exception as e:
+            # raised by join, the same way as callback errors
+            if self.error is None:
+                self.error = e
+        finally:
+            # closed stream makes the writing child fail instead of blocking if the stream is not fully drained
+            if self.token is None or self.error is not None:
+                self.stream.close()
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def join(self):
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def drained(self, timeout=None):
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    @property
+    def text(self):
+        return ''.join(self.tail)
+
+
+def wait(is_done, timeout=None, cancel=None):
+    """
+    Waits until is_done(seconds) returns True, is_done must block for no longer than given seconds(None - forever).
+    Returns None if done, otherwise ScriptTimeoutException or ScriptCancelledException class
+    if timeout expired or cancel event is set.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        interval = None if cancel is None else CANCEL_CHECK_INTERVAL
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return ScriptTimeoutException
+            interval = remaining if interval is None else min(interval, remaining)
+        if is_done(interval):
+            return None
+        if cancel is not None and cancel.is_set():
+            return ScriptCancelledException
+
+
+def exited(process, seconds=None):
+    try:
+        process.wait(seconds)
+        return True
+    except subprocess.TimeoutExpired:
+        return False
+
+
+def exitcode(status):
+    """
+    Same as Popen.returncode for the os.wait status, os.waitstatus_to_exitcode requires python 3.9
+    """
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+class ProcessWaiter:
+    """
+    Reaps the child process with os.wait4 in a separate thread to collect its resource usage.
+    process.returncode is set once the process exits, so process must not be waited by other means.
+    Waiting error is raised by result.
+    """
+
+    def __init__(self, process, started):
+        self.process = process
+        self.started = started
+        self.finished = None
+        self.rusage = None
+        self.error = None
+        self.thread = threading.Thread(target=self.__wait, daemon=True)
+
+    def __wait(self):
+        try:
+            _, status, self.rusage = os.wait4(self.process.pid, 0)
+            self.process.returncode = exitcode(status)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.finished = time.monotonic()
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def wait(self, seconds=None):
+        self.thread.join(seconds)
+        return not self.thread.is_alive()
+
+    def result(self, stdout=None, stderr=None):
+        if self.error is not None:
+            raise BackendException('Unable to wait for the script process %s' % self.process.pid) from self.error
+        return ScriptResult(
+            self.process.returncode,
+            stdout,
+            stderr,
+            self.finished - self.started,
+            self.rusage.ru_utime + self.rusage.ru_stime,
+            self.rusage.ru_maxrss * RSS_UNIT
+        )
+
+
+def descendants(pid):
+    """
+    Pids of the running descendants of the process, empty list if /proc is not available
+    """
+    children = collections.defaultdict(list)
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/%s/stat' % entry, 'rt') as f:
+                # process name may contain spaces, fields after it are space separated
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            # process exited
+            continue
+        children[ppid].append(int(entry))
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children[stack.pop()]:
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def terminate(process, group=True, is_done=None):
+    """
+    Sends SIGTERM to the process group or to the process and its descendants, SIGKILL is sent to the processes
+    still running after TERMINATE_TIMEOUT seconds.
+    Process group includes the children of the process, e.g. aws cli called by the script.
+    Process which shares the group of the current process is terminated with its descendants instead.
+    is_done(seconds) waits for the process exit, process.wait is used by default.
+    """
+    if is_done is None:
+        is_done = functools.partial(exited, process)
+    # orphaned descendants are reparented, so they are found while the process is running
+    tree = [] if group else descendants(process.pid)
+
+    def send(sig):
+        try:
+            if group:
+                os.killpg(process.pid, sig)
+            else:
+                process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+        for pid in tree:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+    if not is_done(0):
+        send(signal.SIGTERM)
+        is_done(TERMINATE_TIMEOUT)
+    # children may outlive the group leader
+    send(signal.SIGKILL)
+    is_done(None)
+
+
+def aborted(reason, timeout, stderr, returncode, result=None):
+    if reason is ScriptTimeoutException:
+        msg = 'Script timed out after %ss' % timeout
+    else:
+        msg = 'Script cancelled'
+    return reason('%s\n%s' % (msg, stderr), returncode, result)
+
+
+def not_started(script_call_args, error):
+    """
+    Converts script start failure to the exit code bash reports for a missing(127)
+    or not executable(126) command, so callers handle it as any other script failure
+    """
+    returncode = 126 if isinstance(error, PermissionError) else 127
+    return ScriptException('%s: %s\n' % (script_call_args[0], error.strerror), returncode)
 
 
 def __cli_params_to_script_call(
@@ -25,32 +292,272 @@ def __cli_params_to_script_call(
                 options_list.append(str(key))
                 options_list.append(str(value))
     script_fullpath = os.path.join(script_path, script_name)
-    return ' '.join(
+    return (
         [script_fullpath] +
         options_list +
-        args
+        list(str(arg) for arg in args)
     )
 
 
-def run(script_name, args, options, _is_cli):
+def run(
+    script_name,
+    args,
+    options,
+    _is_cli,
+    on_stdout=None,
+    on_stderr=None,
+    tail=OUTPUT_TAIL_LINES,
+    timeout=None,
+    cancel=None
+):
+    """
+    Runs gen3 script from GENERATION_DIR and returns ScriptResult.
+
+    In cli mode the script inherits stdout/stderr of the current process.
+    Otherwise both streams are drained concurrently: every line is passed to on_stdout/on_stderr callbacks
+    and the last TAIL lines of stderr are used as ScriptException message if the script fails,
+    exception result attribute holds the ScriptResult of the failed script.
+    If COT_WORKERS is set, bash scripts of the non cli calls are run by the persistent workers.
+
+    Script is terminated if it runs longer than timeout seconds or cancel(threading.Event) is set,
+    ScriptTimeoutException or ScriptCancelledException is raised. Non cli script runs in its own
+    process group which is terminated together with the script. Cli script stays in the terminal
+    foreground process group, so it is terminated together with its descendants.
+    Processes left running in the background by the finished script are not terminated.
+    """
+    with trace.span('runner.run %s' % script_name, 'subprocess', script=script_name) as span:
+        try:
+            result = __run(script_name, args, options, _is_cli, on_stdout, on_stderr, tail, timeout, cancel)
+        except ScriptException as e:
+            span['returncode'] = e.returncode
+            raise
+        # output is not a part of the trace
+        span.update(result._asdict(), stdout=None, stderr=None)
+        return result
+
+
+def __run(script_name, args, options, _is_cli, on_stdout, on_stderr, tail, timeout, cancel):
+    # script is executed directly, without intermediate shell
+    script_call_args = __cli_params_to_script_call(
+        env.GENERATION_DIR,
+        script_name,
+        args=args,
+        options=options
+    )
+    started = time.monotonic()
+    if not _is_cli and env.WORKERS:
+        # imported only when workers are enabled
+        from . import workers
+        pool = workers.get_pool()
+        if pool.accepts(script_call_args[0]):
+            returncode, stdout, stderr = pool.run(script_call_args, on_stdout, on_stderr, tail, timeout, cancel)
+            result = ScriptResult(returncode, stdout, stderr, time.monotonic() - started, None, None)
+            if returncode != 0:
+                raise ScriptException(stderr, returncode, result)
+            return result
     try:
-        script_call_line = __cli_params_to_script_call(
-            env.GENERATION_DIR,
-            script_name,
-            args=args,
-            options=options
-        )
         process = subprocess.Popen(
-            ['/bin/bash', '-c', script_call_line],
+            script_call_args,
             stdout=None if _is_cli else subprocess.PIPE,
             stderr=None if _is_cli else subprocess.PIPE,
-            encoding='utf-8'
+            encoding='utf-8',
+            # undecodable output(e.g. binary or decrypted data) must not stop the output draining
+            errors='replace',
+            # cli script stays in the terminal foreground process group to receive Ctrl+C, Ctrl+Z and read input
+            start_new_session=not _is_cli
         )
-        process.wait()
-        if not _is_cli and process.returncode != 0:
-            raise BackendException(process.stderr.read())
+    except OSError as e:
+        raise not_started(script_call_args, e) from e
+    waiter = ProcessWaiter(process, started).start()
+    try:
+        if _is_cli:
+            reason = wait(waiter.wait, timeout, cancel)
+            if reason is not None:
+                terminate(process, False, waiter.wait)
+                raise aborted(reason, timeout, '', process.returncode, waiter.result())
+            return waiter.result()
+        stdout = StreamCapture(process.stdout, on_stdout, tail).start()
+        stderr = StreamCapture(process.stderr, on_stderr, tail).start()
+        reason = wait(waiter.wait, timeout, cancel)
+        if reason is not None:
+            terminate(process, True, waiter.wait)
+        stdout.join()
+        stderr.join()
+        result = waiter.result(stdout.text, stderr.text)
+        if reason is not None:
+            raise aborted(reason, timeout, stderr.text, process.returncode, result)
+        if process.returncode != 0:
+            raise ScriptException(stderr.text, process.returncode, result)
+        return result
     finally:
+        # script is still running only if waiting or output handling failed(e.g. KeyboardInterrupt)
+        if not waiter.wait(0):
+            terminate(process, not _is_cli, waiter.wait)
+
+
+async def __drain_async(stream, callback, tail):
+    """
+    Async version of StreamCapture, lines are not limited by asyncio stream buffer size.
+    Returns (tail lines, callback error)
+    """
+    lines = collections.deque(maxlen=tail)
+    error = None
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ''
+    while True:
+        chunk = await stream.read(ASYNC_READ_SIZE)
+        buffer += decoder.decode(chunk, final=not chunk)
+        *complete, buffer = buffer.split('\n')
+        complete = [line + '\n' for line in complete]
+        if not chunk and buffer:
+            complete.append(buffer)
+        for line in complete:
+            lines.append(line)
+            if callback is not None and error is None:
+                try:
+                    callback(line)
+                except Exception as e:
+                    # stream must be drained anyway otherwise the child can block on a full pipe
+                    error = e
+        if not chunk:
+            return lines, error
+
+
+async def terminate_async(process):
+    """
+    Async version of terminate for the process started in its own session
+    """
+    def send(sig):
         try:
-            process.kill()
+            os.killpg(process.pid, sig)
         except ProcessLookupError:
             pass
+    if process.returncode is None:
+        send(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+    # children may outlive the group leader
+    send(signal.SIGKILL)
+    await process.wait()
+
+
+async def run_async(
+    script_name,
+    args,
+    options,
+    on_stdout=None,
+    on_stderr=None,
+    tail=OUTPUT_TAIL_LINES,
+    timeout=None
+):
+    """
+    Runs gen3 script from GENERATION_DIR without blocking the event loop, so many scripts
+    can run concurrently in one thread. Output and result are handled the same way as by the non cli run,
+    resource usage is not collected.
+
+    Script runs in its own process group which is terminated if the script runs longer
+    than timeout seconds(ScriptTimeoutException is raised) or the calling task is cancelled.
+    Persistent workers are not used.
+    """
+    script_call_args = __cli_params_to_script_call(
+        env.GENERATION_DIR,
+        script_name,
+        args=args,
+        options=options
+    )
+    started = time.monotonic()
+    traced = trace.now()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *script_call_args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+    except OSError as e:
+        raise not_started(script_call_args, e) from e
+    streams = asyncio.gather(
+        __drain_async(process.stdout, on_stdout, tail),
+        __drain_async(process.stderr, on_stderr, tail)
+    )
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), timeout)
+            reason = None
+        except asyncio.TimeoutError:
+            reason = ScriptTimeoutException
+            await terminate_async(process)
+        (stdout, stdout_error), (stderr, stderr_error) = await streams
+        result = ScriptResult(
+            process.returncode,
+            ''.join(stdout),
+            ''.join(stderr),
+            time.monotonic() - started,
+            None,
+            None
+        )
+        if reason is not None:
+            raise aborted(reason, timeout, result.stderr, process.returncode, result)
+        for error in (stdout_error, stderr_error):
+            if error is not None:
+                raise error
+        if process.returncode != 0:
+            raise ScriptException(result.stderr, process.returncode, result)
+        return result
+    finally:
+        await asyncio.shield(terminate_async(process))
+        # readers reach EOF as the whole process group is killed
+        await asyncio.gather(streams, return_exceptions=True)
+        # concurrent calls overlap, each one is shown on its own track
+        trace.add(
+            'runner.run_async %s' % script_name,
+            'subprocess',
+            traced,
+            {'script': script_name, 'pid': process.pid, 'returncode': process.returncode},
+            tid=process.pid
+        )
+
+
+def script_backend(script_name, options):
+    """
+    Returns (run, run_async) entry points of the backend running the gen3 script,
+    options(**kwargs) maps the backend parameters to the script options.
+    """
+    def backend_run(
+        _is_cli=False,
+        _on_stdout=None,
+        _on_stderr=None,
+        _timeout=None,
+        _cancel=None,
+        **kwargs
+    ):
+        return run(
+            script_name,
+            [],
+            options(**kwargs),
+            _is_cli,
+            on_stdout=_on_stdout,
+            on_stderr=_on_stderr,
+            timeout=_timeout,
+            cancel=_cancel
+        )
+
+    async def backend_run_async(
+        _on_stdout=None,
+        _on_stderr=None,
+        _timeout=None,
+        **kwargs
+    ):
+        return await run_async(
+            script_name,
+            [],
+            options(**kwargs),
+            on_stdout=_on_stdout,
+            on_stderr=_on_stderr,
+            timeout=_timeout
+        )
+
+    return backend_run, backend_run_async
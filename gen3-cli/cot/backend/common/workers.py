@@ -0,0 +1,222 @@
+import os
+import time
+import uuid
+import atexit
+import functools
+import threading
+import subprocess
+from cot import env
+from .runner import StreamCapture, OUTPUT_TAIL_LINES, wait, terminate, aborted
+from .exceptions import WorkerException
+
+
+# idle worker is pinged before use if it was not used for this number of seconds
+HEALTH_CHECK_INTERVAL = 10
+
+# Worker loop. Request is a NUL separated frame: token, working dir, argc, argv.
+# Script is sourced in a subshell, so the state initialized on worker start is reused
+# without being changed by the scripts. Call ends with the token line on stderr
+# and the token line with exit code on stdout. Request without argv is a health check.
+WORKER_SCRIPT = r'''
+if [[ -n "$1" ]]; then
+    source "$1" || exit
+fi
+while IFS= read -r -d '' __cot_token; do
+    IFS= read -r -d '' __cot_cwd
+    IFS= read -r -d '' __cot_argc
+    __cot_argv=()
+    for ((__cot_i = 0; __cot_i < __cot_argc; __cot_i++)); do
+        IFS= read -r -d '' __cot_arg
+        __cot_argv+=("${__cot_arg}")
+    done
+    __cot_returncode=0
+    if (( __cot_argc > 0 )); then
+        (
+            cd -- "${__cot_cwd}" || exit
+            BASH_ARGV0="${__cot_argv[0]}"
+            set -- "${__cot_argv[@]}"
+            shift
+            source "${__cot_argv[0]}"
+        ) </dev/null
+        __cot_returncode=$?
+    fi
+    printf '%s\n' "${__cot_token}" >&2
+    printf '%s %s\n' "${__cot_token}" "${__cot_returncode}"
+done
+'''
+
+
+@functools.lru_cache(maxsize=None)
+def is_bash_script(filename):
+    """
+    Only bash scripts can be sourced by the worker, others are executed as usual
+    """
+    try:
+        with open(filename, 'rt') as f:
+            line = f.readline()
+    except (OSError, UnicodeDecodeError):
+        return False
+    return line.startswith('#!') and 'bash' in line
+
+
+class Worker:
+    """
+    Persistent bash process running scripts one by one
+    """
+
+    def __init__(self, init=None):
+        self.environ = dict(os.environ)
+        self.process = subprocess.Popen(
+            ['/bin/bash', '-c', WORKER_SCRIPT, 'cot-worker', init or ''],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding='utf-8',
+            errors='replace',
+            # scripts and their children are terminated together with the worker
+            start_new_session=True
+        )
+        self.calls = 0
+        self.broken = False
+        self.used = time.monotonic()
+
+    def call(self, argv, on_stdout=None, on_stderr=None, tail=OUTPUT_TAIL_LINES, timeout=None, cancel=None):
+        """
+        Returns (returncode, stdout tail, stderr tail).
+        Worker is terminated if the call is timed out or cancelled.
+        """
+        token = uuid.uuid4().hex
+        frame = [token, os.getcwd(), str(len(argv)), *argv]
+        self.calls += 1
+        self.used = time.monotonic()
+        try:
+            self.process.stdin.write(''.join(field + '\0' for field in frame))
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.broken = True
+            raise WorkerException('Worker %s is not available' % self.process.pid) from e
+        stdout = StreamCapture(self.process.stdout, on_stdout, tail, token).start()
+        stderr = StreamCapture(self.process.stderr, on_stderr, tail, token).start()
+        reason = wait(stdout.drained, timeout, cancel)
+        if reason is not None:
+            self.broken = True
+            terminate(self.process)
+        try:
+            stdout.join()
+        finally:
+            stderr.join()
+        if reason is not None:
+            raise aborted(reason, timeout, stderr.text, self.process.returncode)
+        if stdout.trailer is None or stderr.trailer is None:
+            self.broken = True
+            raise WorkerException('Worker %s terminated unexpectedly' % self.process.pid)
+        return int(stdout.trailer), stdout.text, stderr.text
+
+    def ping(self):
+        try:
+            return self.call([]) == (0, '', '')
+        except WorkerException:
+            return False
+
+    def healthy(self):
+        if self.broken or self.process.poll() is not None:
+            return False
+        # scripts must see the current environment
+        if self.environ != os.environ:
+            return False
+        if time.monotonic() - self.used > HEALTH_CHECK_INTERVAL:
+            return self.ping()
+        return True
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        try:
+            terminate(self.process)
+        finally:
+            self.process.stdout.close()
+            self.process.stderr.close()
+
+
+class WorkerPool:
+    """
+    Bounded pool of workers. Worker is restarted after max_calls calls, when it's broken
+    or fails health check.
+    """
+
+    def __init__(self, size, max_calls=100, init=None):
+        self.size = size
+        self.max_calls = max_calls
+        self.init = init
+        self.idle = []
+        self.started = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def accepts(self, filename):
+        # not executable script must fail the same way as when it is executed directly
+        return os.access(filename, os.X_OK) and is_bash_script(filename)
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                while self.idle:
+                    worker = self.idle.pop()
+                    if worker.healthy():
+                        return worker
+                    worker.close()
+                    self.started -= 1
+                if self.started < self.size:
+                    self.started += 1
+                    break
+                self.condition.wait()
+        try:
+            return Worker(self.init)
+        except Exception:
+            with self.condition:
+                self.started -= 1
+                self.condition.notify()
+            raise
+
+    def release(self, worker):
+        with self.condition:
+            if self.closed or worker.broken or worker.calls >= self.max_calls:
+                worker.close()
+                self.started -= 1
+            else:
+                self.idle.append(worker)
+            self.condition.notify()
+
+    def run(self, argv, on_stdout=None, on_stderr=None, tail=OUTPUT_TAIL_LINES, timeout=None, cancel=None):
+        worker = self.acquire()
+        try:
+            return worker.call(argv, on_stdout, on_stderr, tail, timeout, cancel)
+        finally:
+            self.release(worker)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            workers, self.idle = self.idle, []
+            self.started -= len(workers)
+        for worker in workers:
+            worker.close()
+
+
+__pool = None
+__pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns pool shared by the current process, COT_WORKERS sets the pool size
+    """
+    global __pool
+    with __pool_lock:
+        if __pool is None:
+            __pool = WorkerPool(env.WORKERS, env.WORKER_MAX_CALLS, env.WORKER_INIT)
+            atexit.register(__pool.close)
+        return __pool
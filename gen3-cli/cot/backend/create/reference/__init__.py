@@ -1,13 +1,17 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'createReference.sh'
+
+
+def options(
     reference_type=None,
-    reference_output_dir=None,
-    _is_cli=False
+    reference_output_dir=None
 ):
-    options = {
+    return {
         '-t': reference_type,
         '-o': reference_output_dir
     }
-    runner.run('createReference.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
@@ -1,7 +1,14 @@
-from cot.backend.common import runner
+import os
+import tempfile
+import threading
+import functools
+from cot.backend.common import runner, parallel
 
 
-def run(
+SCRIPT = 'createTemplate.sh'
+
+
+def options(
     config_ref=None,
     resource_group=None,
     level=None,
@@ -14,10 +21,9 @@ def run(
     generation_framework=None,
     generation_testcase=None,
     generation_scenarios=None,
-    generation_input_source=None,
-    _is_cli=False
+    generation_input_source=None
 ):
-    options = {
+    return {
         '-c': config_ref,
         '-g': resource_group,
         '-l': level,
@@ -32,4 +38,39 @@ def run(
         '-s': generation_scenarios,
         '-i': generation_input_source
     }
-    runner.run('createTemplate.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
+
+
+def run_units(
+    deployment_units=None,
+    workers=None,
+    log_dir=None,
+    on_result=None,
+    timeout=None,
+    **kwargs
+):
+    """
+    Generates templates for multiple deployment units in parallel.
+    Output of every unit goes to <log_dir>/<unit>.log, temporary dir is created if no log_dir provided.
+    Unit generation is terminated after timeout seconds, running units are terminated if waiting is interrupted.
+    Returns list of parallel.TaskResult in deployment_units order.
+    """
+    if log_dir is None:
+        log_dir = tempfile.mkdtemp(prefix='cot-create-template-')
+    os.makedirs(log_dir, exist_ok=True)
+    cancel = threading.Event()
+    tasks = dict()
+    for unit in deployment_units or ():
+        tasks[unit] = functools.partial(
+            parallel.run_logged,
+            unit,
+            run,
+            log_dir,
+            timeout,
+            cancel,
+            **kwargs,
+            deployment_unit=unit
+        )
+    return parallel.run_pool(tasks, workers=workers, on_result=on_result, cancel=cancel)
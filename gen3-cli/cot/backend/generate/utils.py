@@ -1,6 +1,5 @@
 import os
-from cookiecutter.main import cookiecutter as cookiecutter_main
-from cot import conf
+from cot import conf, trace
 
 
 def replace_parameters_values(kwargs, replacers=None):
@@ -12,6 +11,9 @@ def replace_parameters_values(kwargs, replacers=None):
 
 
 def cookiecutter(*template_path, **kwargs):
+    # cookiecutter is heavy, importing it only when template is rendered
+    with trace.span('import cookiecutter', 'import'):
+        from cookiecutter.main import cookiecutter as cookiecutter_main
     replace_parameters_values(
         kwargs,
         [
@@ -21,8 +23,9 @@ def cookiecutter(*template_path, **kwargs):
         ]
     )
     template_path = os.path.join(conf.COOKIECUTTER_TEMPLATES_BASE_DIR, *template_path)
-    cookiecutter_main(
-        template_path,
-        no_input=True,
-        extra_context=kwargs
-    )
+    with trace.span('cookiecutter', 'cookiecutter', template=template_path):
+        cookiecutter_main(
+            template_path,
+            no_input=True,
+            extra_context=kwargs
+        )
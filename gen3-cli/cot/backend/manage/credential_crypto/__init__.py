@@ -1,17 +1,19 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'manageCredentialCrypto.sh'
+
+
+def options(
     credential_email=None,
     crypto_file=None,
     credential_id=None,
     credential_path=None,
     credential_secret=None,
     visible=None,
-    credential_type=None,
-    _is_cli=False
+    credential_type=None
 ):
-    options = {
+    return {
         '-e': credential_email,
         '-f': crypto_file,
         '-i': credential_id,
@@ -20,4 +22,6 @@ def run(
         '-y': credential_type,
         '-s': credential_secret
     }
-    runner.run('manageCredentialCrypto.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
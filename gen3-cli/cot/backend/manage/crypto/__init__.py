@@ -1,7 +1,10 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'manageCrypto.sh'
+
+
+def options(
     alias=None,
     base64_decode=None,
     decrypt=None,
@@ -13,10 +16,9 @@ def run(
     quiet=None,
     crypto_text=None,
     update=None,
-    visible=None,
-    _is_cli=False
+    visible=None
 ):
-    options = {
+    return {
         '-a': alias,
         '-b': base64_decode,
         '-d': decrypt,
@@ -30,4 +32,6 @@ def run(
         '-u': update,
         '-v': visible
     }
-    runner.run('manageCrypto.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
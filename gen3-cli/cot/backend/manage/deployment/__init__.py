@@ -1,7 +1,10 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'manageDeployment.sh'
+
+
+def options(
     delete=None,
     deployment_initiate=None,
     level=None,
@@ -11,10 +14,9 @@ def run(
     deployment_scope=None,
     deployment_unit=None,
     deployment_wait=None,
-    deployment_unit_subset=None,
-    _is_cli=False
+    deployment_unit_subset=None
 ):
-    options = {
+    return {
         '-d': delete,
         '-i': deployment_initiate,
         '-m': deployment_monitor,
@@ -26,4 +28,6 @@ def run(
         '-w': deployment_wait,
         '-z': deployment_unit_subset
     }
-    runner.run('manageDeployment.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
@@ -1,17 +1,21 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'manageFileCrypto.sh'
+
+
+def options(
     decrypt=None,
     encrypt=None,
     crypto_file=None,
-    update=None,
-    _is_cli=False
+    update=None
 ):
-    options = {
+    return {
         '-d': decrypt,
         '-e': encrypt,
         '-f': crypto_file,
         '-u': update
     }
-    runner.run('manageFileCrypto.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
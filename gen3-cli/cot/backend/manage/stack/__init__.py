@@ -1,7 +1,19 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'manageStack.sh'
+# stack levels accepted by the script
+LEVELS = [
+    'account',
+    'product',
+    'segment',
+    'solution',
+    'application',
+    'multiple'
+]
+
+
+def options(
     delete=None,
     stack_initiate=None,
     stack_monitor=None,
@@ -11,10 +23,9 @@ def run(
     region=None,
     deployment_unit=None,
     deployment_unit_subset=None,
-    dryrun=None,
-    _is_cli=False
+    dryrun=None
 ):
-    options = {
+    return {
         '-d': delete,
         '-i': stack_initiate,
         '-m': stack_monitor,
@@ -26,4 +37,6 @@ def run(
         '-z': deployment_unit_subset,
         '-l': level
     }
-    runner.run('manageStack.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import threading
+import functools
+from cot.backend.common import parallel
+from cot.backend.common.exceptions import UserFriendlyBackendException
+from cot.backend.manage import stack as manage_stack_backend
+
+
+# must be deployed before any other unit of the level
+BASELINE_UNITS = {
+    'segment': 'baseline'
+}
+# level -> unit -> units which must be deployed before it
+UNITS_DEPENDENCIES = {
+    'segment': {
+        'igw': ['vpc'],
+        'nat': ['vpc'],
+        'vpcendpoint': ['vpc']
+    }
+}
+STACK_SEPARATOR = ':'
+
+
+def parse_stack(stack):
+    try:
+        level, unit = stack.split(STACK_SEPARATOR)
+    except ValueError as e:
+        raise UserFriendlyBackendException(
+            'Invalid stack "%s". Must be LEVEL%sDEPLOYMENT_UNIT' % (stack, STACK_SEPARATOR)
+        ) from e
+    if not level or not unit:
+        raise UserFriendlyBackendException('Invalid stack "%s"' % stack)
+    if level.lower() not in manage_stack_backend.LEVELS:
+        raise UserFriendlyBackendException(
+            'Invalid stack "%s". LEVEL must be one of: %s' % (stack, ', '.join(manage_stack_backend.LEVELS))
+        )
+    return level.lower(), unit
+
+
+def format_stack(level, unit):
+    return '%s%s%s' % (level, STACK_SEPARATOR, unit)
+
+
+def default_dependencies(stacks):
+    """
+    Dependencies between given stacks of the same level which follow gen3 deployment rules:
+    1. Level baseline unit is deployed before any other unit of the level
+    2. Network units are deployed after vpc
+    """
+    parsed = list(parse_stack(stack) for stack in stacks)
+    dependencies = {stack: set() for stack in stacks}
+    for stack, (level, unit) in zip(stacks, parsed):
+        for other, (other_level, other_unit) in zip(stacks, parsed):
+            if other == stack or other_level != level:
+                continue
+            if other_unit == BASELINE_UNITS.get(level):
+                dependencies[stack].add(other)
+            elif other_unit in UNITS_DEPENDENCIES.get(level, {}).get(unit, []):
+                dependencies[stack].add(other)
+    return dependencies
+
+
+def build_graph(stacks, dependencies=None, use_default_dependencies=True):
+    """
+    dependencies is a dict stack -> iterable of stacks which must be deployed before.
+    All stacks must be of the same level, because the stack script is run from the current directory
+    which must correspond to the stack level.
+    Returns dict stack -> set of stacks.
+    """
+    levels = sorted(set(parse_stack(stack)[0] for stack in stacks))
+    if len(levels) > 1:
+        raise UserFriendlyBackendException(
+            'All stacks must be of the same level, found: %s. '
+            'Stacks of each level must be managed from the level directory' % ', '.join(levels)
+        )
+    if use_default_dependencies:
+        graph = default_dependencies(stacks)
+    else:
+        graph = {stack: set() for stack in stacks}
+    for stack, deps in (dependencies or {}).items():
+        for dep in [stack, *deps]:
+            if dep not in graph:
+                raise UserFriendlyBackendException('Unknown stack "%s" in dependencies' % dep)
+        graph[stack].update(deps)
+    parallel.sort_graph(graph)
+    return graph
+
+
+def reverse_graph(graph):
+    reversed_graph = {stack: set() for stack in graph}
+    for stack, deps in graph.items():
+        for dep in deps:
+            reversed_graph[dep].add(stack)
+    return reversed_graph
+
+
+def run(
+    stacks=None,
+    dependencies=None,
+    use_default_dependencies=True,
+    workers=None,
+    log_dir=None,
+    on_result=None,
+    delete=None,
+    timeout=None,
+    **kwargs
+):
+    """
+    Manages multiple stacks running independent ones in parallel.
+    Stacks are deleted in the reversed dependencies order.
+    kwargs are passed to every manage stack run.
+    Stack management is terminated after timeout seconds, running stacks are terminated if waiting is interrupted.
+    Returns list of parallel.TaskResult in stacks order.
+    """
+    graph = build_graph(stacks, dependencies, use_default_dependencies)
+    if delete:
+        graph = reverse_graph(graph)
+    if log_dir is None:
+        log_dir = tempfile.mkdtemp(prefix='cot-manage-stacks-')
+    os.makedirs(log_dir, exist_ok=True)
+    cancel = threading.Event()
+    tasks = dict()
+    for stack in stacks:
+        level, unit = parse_stack(stack)
+        tasks[stack] = functools.partial(
+            parallel.run_logged,
+            stack,
+            manage_stack_backend.run,
+            log_dir,
+            timeout,
+            cancel,
+            **kwargs,
+            delete=delete,
+            level=level,
+            deployment_unit=unit
+        )
+    return parallel.run_graph(tasks, graph, workers=workers, on_result=on_result, cancel=cancel)
@@ -1,7 +1,10 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'runExpoAppPublish.sh'
+
+
+def options(
     deployment_unit=None,
     run_setup=None,
     binary_expiration=None,
@@ -9,10 +12,9 @@ def run(
     submit_binary=None,
     disable_ota=None,
     binary_build_process=None,
-    qr_build_formats=None,
-    _is_cli=False
+    qr_build_formats=None
 ):
-    options = {
+    return {
         '-u': deployment_unit,
         '-s': run_setup,
         '-t': binary_expiration,
@@ -22,4 +24,6 @@ def run(
         '-b': binary_build_process,
         '-q': qr_build_formats
     }
-    runner.run('runExpoAppPublish.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
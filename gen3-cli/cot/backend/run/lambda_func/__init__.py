@@ -1,17 +1,21 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'runLambda.sh'
+
+
+def options(
     function_id=None,
     deployment_unit=None,
     input_payload=None,
-    include_log_tail=None,
-    _is_cli=False
+    include_log_tail=None
 ):
-    options = {
+    return {
         '-f': function_id,
         '-u': deployment_unit,
         '-i': input_payload,
         '-l': include_log_tail
     }
-    runner.run('runLambda.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
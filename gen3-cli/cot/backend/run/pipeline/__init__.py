@@ -1,16 +1,18 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'runPipeline.sh'
+
+
+def options(
     component=None,
     tier=None,
     instance=None,
     version=None,
     pipeline_status_only=None,
-    pipeline_allow_concurrent=None,
-    _is_cli=False
+    pipeline_allow_concurrent=None
 ):
-    options = {
+    return {
         '-i': component,
         '-t': tier,
         '-x': instance,
@@ -18,4 +20,6 @@ def run(
         '-s': pipeline_status_only,
         '-c': pipeline_allow_concurrent
     }
-    runner.run('runPipeline.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
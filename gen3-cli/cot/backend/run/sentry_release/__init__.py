@@ -1,17 +1,21 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'runSentryRelease.sh'
+
+
+def options(
     sentry_source_map_s3_url=None,
     sentry_url_prefix=None,
     sentry_release_name=None,
-    run_setup=None,
-    _is_cli=False
+    run_setup=None
 ):
-    options = {
+    return {
         '-m': sentry_source_map_s3_url,
         '-p': sentry_url_prefix,
         '-r': sentry_release_name,
         '-s': run_setup
     }
-    runner.run('runSentryRelease.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
@@ -1,7 +1,10 @@
 from cot.backend.common import runner
 
 
-def run(
+SCRIPT = 'runTask.sh'
+
+
+def options(
     container_id=None,
     delay=None,
     env_name=None,
@@ -12,10 +15,9 @@ def run(
     value=None,
     task=None,
     instance=None,
-    version=None,
-    _is_cli=False
+    version=None
 ):
-    options = {
+    return {
         '-c': container_id,
         '-d': delay,
         '-e': env_name,
@@ -28,4 +30,6 @@ def run(
         '-x': instance,
         '-y': version
     }
-    runner.run('runTask.sh', [], options, _is_cli)
+
+
+run, run_async = runner.script_backend(SCRIPT, options)
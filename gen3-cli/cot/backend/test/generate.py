@@ -1,34 +1,207 @@
+import io
 import os
+import re
 import json
+import hashlib
+import tempfile
 from .renderer import testcases_template
+from .loader import templates_digest
+from cot.backend.common.exceptions import UserFriendlyBackendException
 
 
 TESTCASE_EXT = '.testcase.json'
+# rendered testcases of the incremental generation are stored in <output><MANIFEST_EXT>
+MANIFEST_EXT = '.manifest.json'
+# JSON strings(keys are followed by colon) and brackets, used to find testcase lines without parsing file twice
+TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"(\s*:)?|[{}\[\]]')
 
 
-def run(
-    filenames=None,
-    output=None,
-    directory=None
-):
-    filenames = filenames or []
+def testcase_filenames(filenames=None, directory=None):
+    filenames = list(filenames or [])
     # searching testcase files in given directory if no files provided
     if not filenames and directory:
         for name in os.listdir(directory):
             if name.endswith(TESTCASE_EXT):
                 filenames.append(os.path.join(directory, name))
+    return filenames
+
+
+def key_lines(text):
+    """
+    Returns line numbers of the top level object keys in the file order
+    """
+    lines = []
+    depth = 0
+    line = 1
+    offset = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group(0)
+        if token in '{[':
+            depth += 1
+        elif token in '}]':
+            depth -= 1
+        elif depth == 1 and match.group(1):
+            line += text.count('\n', offset, match.start())
+            offset = match.start()
+            lines.append(line)
+    return lines
+
+
+def load_testcases(filename, content):
+    """
+    Returns list of (casename, data, line) in the file order.
+    Unlike json.loads duplicated casenames are kept.
+    """
+    pairs = []
+
+    def hook(object_pairs):
+        # top level object is decoded last
+        pairs[:] = object_pairs
+        return dict(object_pairs)
+
+    text = content.decode('utf8')
+    if not isinstance(json.loads(text, object_pairs_hook=hook), dict):
+        raise ValueError('Invalid testcase file [%s]. Must contain JSON object' % filename)
+    return [
+        (casename, data, line)
+        for (casename, data), line in zip(pairs, key_lines(text))
+    ]
+
+
+def format_location(filename, line):
+    return filename if line is None else '%s:%s' % (filename, line)
+
+
+def load_manifest(output):
+    try:
+        with open(output + MANIFEST_EXT, 'rt') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return dict()
+    if manifest.get('templates') != templates_digest():
+        return dict()
+    return manifest.get('files', dict())
+
+
+def save_manifest(output, files):
+    with open(output + MANIFEST_EXT, 'wt') as f:
+        json.dump(
+            {
+                'templates': templates_digest(),
+                'files': files
+            },
+            f
+        )
+
 
-    # merging casefiles
+class CaseSpool:
+    """
+    Temporary file keeping rendered testcases until all casenames are known and tests can be written in order.
+    Only the testcase position in the file is kept in memory.
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.file.close()
+
+    def write(self, chunks):
+        start = self.file.tell()
+        for chunk in chunks:
+            self.file.write(chunk.encode('utf8'))
+        return start, self.file.tell() - start
+
+    def read(self, position):
+        start, size = position
+        self.file.seek(start)
+        text = self.file.read(size).decode('utf8')
+        self.file.seek(0, io.SEEK_END)
+        return text
+
+
+def write_tests(stream, cases, spool):
+    for chunk in testcases_template.generate_header(cases):
+        stream.write(chunk)
+    for casename in sorted(cases):
+        case = cases[casename]
+        stream.write(case['text'] if 'text' in case else spool.read(case['position']))
+
+
+def run(
+    filenames=None,
+    output=None,
+    directory=None,
+    incremental=False
+):
+    filenames = testcase_filenames(filenames, directory)
+
+    if incremental and output is None:
+        raise ValueError('Incremental generation requires output file')
+    # testcases of the unchanged files are taken from the previous generation
+    rendered_files = load_manifest(output) if incremental else dict()
+
+    # merging casefiles, files are read and rendered one at a time
+    files = dict()
     cases = dict()
-    for filename in filenames:
-        if not filename.endswith(TESTCASE_EXT):
-            raise ValueError('Invalid extension for [%s]. Must be [%s]' % (filename, TESTCASE_EXT))
-        with open(filename, 'rt') as f:
-            cases.update(**json.load(f))
-
-    text = testcases_template.render(cases)
-    if output is not None:
+    # casename -> [(filename, line)], used to report duplicates in the same pass
+    locations = dict()
+    with CaseSpool() as spool:
+        for filename in filenames:
+            if not filename.endswith(TESTCASE_EXT):
+                raise ValueError('Invalid extension for [%s]. Must be [%s]' % (filename, TESTCASE_EXT))
+            with open(filename, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            key = os.path.abspath(filename)
+            rendered = rendered_files.get(key)
+            if rendered is None or rendered['hash'] != digest:
+                file_cases = dict()
+                for casename, data, line in load_testcases(filename, content):
+                    locations.setdefault(casename, []).append((filename, line))
+                    if incremental:
+                        # manifest keeps rendered text
+                        case = testcases_template.render_case(casename, data)
+                    else:
+                        case = testcases_template.prepare_case(casename, data)
+                        case['position'] = spool.write(
+                            testcases_template.generate_case(casename, data, case['type'])
+                        )
+                    case['line'] = line
+                    file_cases[casename] = case
+                rendered = {
+                    'hash': digest,
+                    'cases': file_cases
+                }
+            else:
+                for casename, case in rendered['cases'].items():
+                    locations.setdefault(casename, []).append((filename, case.get('line')))
+            if incremental:
+                files[key] = rendered
+            cases.update(**rendered['cases'])
+
+        duplicates = sorted(
+            (casename, casename_locations)
+            for casename, casename_locations in locations.items()
+            if len(casename_locations) > 1
+        )
+        if duplicates:
+            raise UserFriendlyBackendException(
+                'Duplicate testcase names:\n%s' % '\n'.join(
+                    '    %s: %s' % (casename, ', '.join(format_location(*location) for location in casename_locations))
+                    for casename, casename_locations in duplicates
+                )
+            )
+
+        if output is None:
+            stream = io.StringIO()
+            write_tests(stream, cases, spool)
+            return stream.getvalue()
         with open(output, 'wt') as f:
-            f.write(text)
-        return ""
-    return text
+            write_tests(f, cases, spool)
+    if incremental:
+        save_manifest(output, files)
+    return ""
@@ -1,14 +1,92 @@
 import os
-from jinja2 import Environment, FileSystemLoader
+import hashlib
+from jinja2 import (
+    Environment,
+    FileSystemLoader,
+    FileSystemBytecodeCache,
+    ModuleLoader
+)
+from cot import env
 
 TEMPLATES_DIR = os.path.join(
     os.path.dirname(os.path.abspath(__file__)),
     'templates'
 )
+# created by compile_templates, "make compile-templates" ships them with the package
+PRECOMPILED_TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'templates_compiled'
+)
+PRECOMPILED_DIGEST_FILENAME = 'templates.sha256'
+BYTECODE_CACHE_DIR = os.path.join(env.CACHE_DIR, 'jinja')
 
-
-loader = Environment(
-    loader=FileSystemLoader(TEMPLATES_DIR),
+ENVIRONMENT_OPTIONS = dict(
     trim_blocks=True,
     lstrip_blocks=True
 )
+
+
+def templates_digest():
+    """
+    Changes when any of the templates changes
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        filename = os.path.join(TEMPLATES_DIR, name)
+        if os.path.isfile(filename):
+            digest.update(name.encode('utf8'))
+            with open(filename, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def compile_templates(target=PRECOMPILED_TEMPLATES_DIR):
+    environment = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        **ENVIRONMENT_OPTIONS
+    )
+    environment.compile_templates(
+        target,
+        zip=None,
+        # byte-compiled template blocks are not templates
+        filter_func=lambda name: not name.startswith('__pycache__/')
+    )
+    with open(os.path.join(target, PRECOMPILED_DIGEST_FILENAME), 'wt') as f:
+        f.write(templates_digest())
+
+
+def is_precompiled(target=PRECOMPILED_TEMPLATES_DIR):
+    try:
+        with open(os.path.join(target, PRECOMPILED_DIGEST_FILENAME), 'rt') as f:
+            return f.read() == templates_digest()
+    except OSError:
+        return False
+
+
+def create_bytecode_cache(directory=BYTECODE_CACHE_DIR):
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        # compilation cache is only an optimization
+        return None
+    return FileSystemBytecodeCache(directory)
+
+
+def create_loader():
+    """
+    Precompiled templates are used if they were compiled from the current templates,
+    otherwise templates are compiled from sources using persistent bytecode cache.
+    """
+    if is_precompiled():
+        return Environment(
+            loader=ModuleLoader(PRECOMPILED_TEMPLATES_DIR),
+            **ENVIRONMENT_OPTIONS
+        )
+    return Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        bytecode_cache=create_bytecode_cache(),
+        **ENVIRONMENT_OPTIONS
+    )
+
+
+loader = create_loader()
@@ -0,0 +1,69 @@
+import csv
+import json
+import collections
+
+
+# generated tests append timing records to the file set in this variable
+PROFILE_ENV = 'COT_TEST_PROFILE'
+KINDS = [
+    'parse',
+    'rule',
+    'lint',
+    'vulnerability'
+]
+RECORD_FIELDS = [
+    'testcase',
+    'template',
+    'kind',
+    'name',
+    'duration'
+]
+
+
+def load_records(filename):
+    records = []
+    with open(filename, 'rt') as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+def summarize(records):
+    """
+    Returns time spent per template, slowest templates first
+    """
+    templates = collections.OrderedDict()
+    for record in records:
+        template = templates.setdefault(
+            record['template'],
+            dict(
+                template=record['template'],
+                total=0,
+                **{kind: 0 for kind in KINDS}
+            )
+        )
+        template[record['kind']] = template.get(record['kind'], 0) + record['duration']
+        template['total'] += record['duration']
+    return sorted(templates.values(), key=lambda template: template['total'], reverse=True)
+
+
+def write_report(records, output):
+    """
+    Writes records as CSV if output has .csv extension, otherwise writes JSON with per template summary
+    """
+    records = sorted(records, key=lambda record: record['duration'], reverse=True)
+    with open(output, 'wt', newline='') as f:
+        if output.endswith('.csv'):
+            writer = csv.DictWriter(f, RECORD_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            json.dump(
+                {
+                    'templates': summarize(records),
+                    'records': records
+                },
+                f,
+                indent=4
+            )
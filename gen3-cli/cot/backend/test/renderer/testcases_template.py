@@ -1,55 +1,97 @@
-import json
 from ..loader import loader
 
 
-def prepare_cf_testcase_context(case):
-    structure = case.get('structure', {})
-    match = structure.get('match', [])
-    stringified_match = []
-    for path, value in match:
-        try:
-            value = json.loads(value)
-        except ValueError:
-            value = "\"{}\"".format(value)
-        except TypeError:
-            pass
-        stringified_match.append((path, value))
+def prepare_case(casename, data):
+    """
+    Returns testcase properties required to render the tests header
+    """
+    type = None
+    lint = False
+    vulnerability = False
+    structure = False
+    if data['filename'].endswith('.json'):
+        type = 'cf'
+    if type == 'cf':
+        lint = not data.get('no_lint', False)
+        vulnerability = not data.get('no_vulnerability_check', False)
+        structure = bool(data.get('structure', False))
+    return {
+        "filename": data['filename'],
+        "type": type,
+        "lint": lint,
+        "vulnerability": vulnerability,
+        "structure": structure
+    }
+
 
-    if structure:
-        if match:
-            structure['match'] = stringified_match
+def generate_case(casename, data, type):
+    """
+    Renders single testcase chunk by chunk, data must be prepared by prepare_case
+    """
+    template = loader.get_template('testcase_block.py.tmpl')
+    return template.generate(casename=casename, case=data, type=type)
 
 
-def prepare_context(cases):
+def render_case(casename, data):
+    """
+    Renders single testcase.
+    Returns dict with the rendered text and the testcase properties required to render the tests header.
+    """
+    case = prepare_case(casename, data)
+    case['text'] = ''.join(generate_case(casename, data, case['type']))
+    return case
+
+
+def prepare_context(rendered_cases):
     test_lint = False
     test_structure = False
     test_vulnerability = False
-    prepared_cases = list()
-    ordered_casenames = list(cases.keys())
+    lint_tests = dict()
+    vulnerability_tests = dict()
+    ordered_casenames = list(rendered_cases.keys())
     ordered_casenames.sort()
     for casename in ordered_casenames:
-        data = cases[casename]
-        type = None
-        if data['filename'].endswith('.json'):
-            type = 'cf'
-        if type == 'cf':
-            prepare_cf_testcase_context(data)
-            if not data.get('no_lint', False):
-                test_lint = True
-            if not data.get('no_vulnerability_check', False):
-                test_vulnerability = True
-            if data.get('structure', False):
-                test_structure = True
-        prepared_cases.append((casename, data, type))
+        case = rendered_cases[casename]
+        if case['lint']:
+            test_lint = True
+            lint_tests['test_%s' % casename] = case['filename']
+        if case['vulnerability']:
+            test_vulnerability = True
+            vulnerability_tests['test_%s' % casename] = case['filename']
+        if case['structure']:
+            test_structure = True
     return {
         "test_lint": test_lint,
+        "lint_tests": lint_tests,
         "test_structure": test_structure,
         "test_vulnerability": test_vulnerability,
-        "cases": prepared_cases
+        "vulnerability_tests": vulnerability_tests,
+        "casenames": ordered_casenames
     }
 
 
-def render(cases=None):
-    context = prepare_context(cases)
+def generate_header(cases):
+    """
+    Renders tests header chunk by chunk, cases texts are not required
+    """
     template = loader.get_template('test_template_base.py.tmpl')
-    return template.render(**context)
+    return template.generate(**prepare_context(cases))
+
+
+def assemble(rendered_cases):
+    """
+    Joins tests header and rendered testcases
+    """
+    return ''.join(generate_header(rendered_cases)) + ''.join(
+        rendered_cases[casename]['text']
+        for casename in sorted(rendered_cases)
+    )
+
+
+def render(cases=None):
+    return assemble(
+        {
+            casename: render_case(casename, data)
+            for casename, data in cases.items()
+        }
+    )
@@ -1,41 +1,151 @@
+import os
+import sys
+import tempfile
 import subprocess
 from pytest import ExitCode as ec
+from . import shard
+from . import profile as test_profile
+
+
+# directory containing cot package, pytest processes import the shard plugin from it
+PACKAGE_ROOT = os.path.dirname(
+    os.path.dirname(
+        os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__))
+        )
+    )
+)
+# pytest exits with TESTS_FAILED code if -p plugin can't be imported
+PLUGIN_ERROR = 'Error importing plugin'
+
+
+def __result(returncode, stderr):
+    if returncode in [ec.OK, ec.NO_TESTS_COLLECTED]:
+        return True
+    if returncode == ec.TESTS_FAILED:
+        return False
+    elif returncode in [ec.INTERNAL_ERROR, ec.USAGE_ERROR]:
+        raise Exception(stderr)
+    else:
+        raise Exception("Unknown exit code: %s" % returncode)
+
+
+def __run_single(args, env):
+    process = subprocess.Popen(
+        args,
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        encoding='utf8',
+        errors='replace',
+        start_new_session=True
+    )
+    try:
+        # stderr must be drained while waiting, otherwise pytest blocks on the full pipe
+        _, stderr = process.communicate()
+        return __result(process.returncode, stderr)
+    finally:
+        process.kill()
+
+
+def __run_sharded(args, env, workers):
+    """
+    Runs pytest process per shard, each process runs only the tests of its shard.
+    Output of the shards is printed as soon as a shard is finished.
+    """
+    processes = []
+    try:
+        for index in range(workers):
+            output = tempfile.TemporaryFile(mode='w+t')
+            process = subprocess.Popen(
+                args,
+                stdin=subprocess.DEVNULL,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                env={
+                    **env,
+                    shard.SHARD_ENV: shard.format_shard(index, workers)
+                },
+                start_new_session=True
+            )
+            processes.append((process, output))
+        results = []
+        for index, (process, output) in enumerate(processes):
+            process.wait()
+            output.seek(0)
+            text = output.read()
+            sys.stdout.write('[shard %s]\n' % shard.format_shard(index, workers))
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            results.append((process.returncode, text))
+        # errors take precedence over the failed tests
+        for returncode, text in results:
+            if returncode not in [ec.OK, ec.NO_TESTS_COLLECTED, ec.TESTS_FAILED]:
+                __result(returncode, text)
+            if PLUGIN_ERROR in text:
+                raise Exception(text)
+        return all(__result(returncode, text) for returncode, text in results)
+    finally:
+        for process, output in processes:
+            process.kill()
+            output.close()
 
 
 def run(
     testpaths=None,
-    silent=True
+    silent=True,
+    no_cache=False,
+    workers=1,
+    profile=None
 ):
     testpaths = testpaths or []
-    # Do not use pytest.main because it can't correctly work with the files changed in runtime
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        path for path in [PACKAGE_ROOT, env.get('PYTHONPATH')] if path
+    )
+    if no_cache:
+        # disables lint and vulnerability results cache of the generated tests
+        env['COT_TEST_NO_CACHE'] = '1'
+    records = None
+    if profile is not None:
+        # generated tests append timings here, all test processes share the file
+        fd, records = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        env[test_profile.PROFILE_ENV] = records
     try:
-        args = [
-            'pytest',
-            '-xvvs' if not silent else '-x',
-            '--cache-clear',
-            *testpaths,
-        ]
-        cmd = " ".join(args)
-        stdin = subprocess.PIPE
-        stderr = subprocess.PIPE
-        process = subprocess.Popen(
+        return __run(testpaths, silent, env, workers)
+    finally:
+        if records is not None:
+            test_profile.write_report(test_profile.load_records(records), profile)
+            os.remove(records)
+
+
+def __run(testpaths, silent, env, workers):
+    # Do not use pytest.main because it can't correctly work with the files changed in runtime
+    # pytest of the current interpreter, cot is not importable by the pytest found on PATH
+    args = [
+        sys.executable,
+        '-m',
+        'pytest',
+        '-xvvs' if not silent else '-x',
+    ]
+    if workers is None or workers <= 1:
+        return __run_single(
             [
-                '/bin/bash',
-                '-c',
-                cmd
+                *args,
+                '--cache-clear',
+                *testpaths
             ],
-            stdin=stdin,
-            stderr=stderr,
-            start_new_session=True
+            env
         )
-        process.wait()
-        if process.returncode in [ec.OK, ec.NO_TESTS_COLLECTED]:
-            return True
-        if process.returncode == ec.TESTS_FAILED:
-            return False
-        elif process.returncode in [ec.INTERNAL_ERROR, ec.USAGE_ERROR]:
-            raise Exception(process.stderr)
-        else:
-            raise Exception("Unknown exit code: %s" % process.returncode)
-    finally:
-        process.kill()
+    # shards can't share pytest cache
+    return __run_sharded(
+        [
+            *args,
+            '-p', 'no:cacheprovider',
+            '-p', shard.__name__,
+            *testpaths
+        ],
+        env,
+        workers
+    )
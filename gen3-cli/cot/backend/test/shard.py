@@ -0,0 +1,42 @@
+"""
+Pytest plugin which keeps only the tests of the current shard.
+Shard is set by COT_TEST_SHARD=INDEX/COUNT environment variable.
+"""
+import os
+import zlib
+
+
+SHARD_ENV = 'COT_TEST_SHARD'
+
+
+def format_shard(index, count):
+    return '%s/%s' % (index, count)
+
+
+def parse_shard(value):
+    index, count = map(int, value.split('/'))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError('Invalid shard %s' % value)
+    return index, count
+
+
+def in_shard(name, index, count):
+    # generated tests use the same rule to prefetch only the templates of their shard
+    return zlib.crc32(name.encode('utf8')) % count == index
+
+
+def pytest_collection_modifyitems(config, items):
+    value = os.environ.get(SHARD_ENV)
+    if not value:
+        return
+    index, count = parse_shard(value)
+    selected = []
+    deselected = []
+    for item in items:
+        if in_shard(item.name, index, count):
+            selected.append(item)
+        else:
+            deselected.append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
@@ -0,0 +1,31 @@
+from .generate import testcase_filenames, load_testcases
+from .templates.cf_structure_obj_block import structure_test
+
+
+def run(
+    filenames=None,
+    directory=None
+):
+    """
+    Evaluates testcases structure rules in the current process without generating and collecting tests.
+    Returns list of (casename, errors) for the testcases having structure rules.
+    """
+    results = []
+    for filename in testcase_filenames(filenames, directory):
+        with open(filename, 'rb') as f:
+            content = f.read()
+        for casename, case, _ in load_testcases(filename, content):
+            rules = case.get('structure')
+            if not rules:
+                continue
+            try:
+                errors = structure_test(case['filename']).apply(rules).errors
+            except AssertionError as e:
+                errors = [
+                    {
+                        'rule': 'load template',
+                        'msg': str(e)
+                    }
+                ]
+            results.append((casename, errors))
+    return results
@@ -3,24 +3,48 @@ class Structure:
     RESOURCES_KEY = 'Resources'
     RESOURCE_TYPE_KEY = 'Type'
     OUTPUT_KEY = 'Output'
+    # path tokens: "*" or "[*]" - any key or index, "{AWS::S3::Bucket}" - resources of the given type
+    WILDCARD = ('*',)
+    TYPE_FILTER = 'type'
 
-    def __init__(self, body):
+    # path string -> tuple of keys, shared by all instances
+    __compiled_paths = dict()
+
+    def __init__(self, body, filename=None, profile=None):
         self.__body = body
+        self.__filename = filename
+        self.__profile = profile
         self.__validators = []
+        # prefix trie of the resolved values, node is (value, children)
+        self.__values = (body, dict())
+        # resource type -> resource ids, built on first use by type filter
+        self.__resource_types = None
 
-    @staticmethod
-    def __split_path(path):
+    @classmethod
+    def __split_path(cls, path):
         import re
         keys = []
-        for m in re.finditer(r"(\w+)|\[(\d+)\]", path):
-            key = m.group(1)
-            index = m.group(2)
+        for m in re.finditer(r"(\w+)|\[(\d+)\]|(\[\*\]|\*)|\{([^}]+)\}", path):
+            key, index, wildcard, type = m.groups()
             if key is not None:
                 keys.append(key)
             elif index is not None:
                 keys.append(int(index))
+            elif wildcard is not None:
+                keys.append(cls.WILDCARD)
+            elif type is not None:
+                keys.append((cls.TYPE_FILTER, type))
         return keys
 
+    @classmethod
+    def compile_path(cls, path):
+        try:
+            return cls.__compiled_paths[path]
+        except KeyError:
+            keys = tuple(cls.__split_path(path))
+            cls.__compiled_paths[path] = keys
+            return keys
+
     @staticmethod
     def __format_keys_to_path(keys):
         result = ""
@@ -33,22 +57,99 @@ class Structure:
             result = result[1:]
         return result
 
+    @staticmethod
+    def __child(node, key):
+        value, children = node
+        try:
+            return children[key]
+        except KeyError:
+            node = children[key] = (value[key], dict())
+            return node
+
     def __get_value_by_json_path(self, path):
-        keys = self.__split_path(path)
-        traversed_keys = []
-        value = self.__body
-        for key in keys:
-            traversed_keys.append(key)
+        """
+        Rules sharing the same path prefix resolve it only once
+        """
+        keys = self.compile_path(path)
+        node = self.__values
+        for index, key in enumerate(keys):
             try:
-                value = value[key]
+                node = self.__child(node, key)
             except (KeyError, IndexError) as e:
-                raise AssertionError('{} does not exist'.format(self.__format_keys_to_path(traversed_keys))) from e
-        return value
+                raise AssertionError(
+                    '{} does not exist'.format(self.__format_keys_to_path(keys[:index + 1]))
+                ) from e
+        return node[0]
+
+    def __filter_by_type(self, value, type):
+        if value is self.__body.get(self.RESOURCES_KEY):
+            if self.__resource_types is None:
+                self.__resource_types = dict()
+                for id, resource in value.items():
+                    self.__resource_types.setdefault(resource.get(self.RESOURCE_TYPE_KEY), []).append(id)
+            return self.__resource_types.get(type, [])
+        if isinstance(value, dict):
+            return [
+                key
+                for key, item in value.items()
+                if isinstance(item, dict) and item.get(self.RESOURCE_TYPE_KEY) == type
+            ]
+        return []
+
+    def __get_values_by_json_path(self, path):
+        """
+        Returns ([(path, value), ...], [missing path error, ...]), wildcards and type filters are expanded
+        """
+        keys = self.compile_path(path)
+        if not any(isinstance(key, tuple) for key in keys):
+            try:
+                return [(path, self.__get_value_by_json_path(path))], []
+            except AssertionError as e:
+                return [], [e.args[0]]
+        candidates = [((), self.__values)]
+        missing = []
+        for key in keys:
+            expanded = []
+            for prefix, node in candidates:
+                value = node[0]
+                if key == self.WILDCARD:
+                    if isinstance(value, dict):
+                        subkeys = list(value)
+                    elif isinstance(value, list):
+                        subkeys = range(len(value))
+                    else:
+                        subkeys = []
+                elif isinstance(key, tuple):
+                    subkeys = self.__filter_by_type(value, key[1])
+                else:
+                    subkeys = [key]
+                for subkey in subkeys:
+                    try:
+                        expanded.append((prefix + (subkey,), self.__child(node, subkey)))
+                    except (KeyError, IndexError, TypeError):
+                        missing.append('{} does not exist'.format(self.__format_keys_to_path(prefix + (subkey,))))
+            candidates = expanded
+        if not candidates and not missing:
+            missing.append('{} does not exist'.format(path))
+        return [(self.__format_keys_to_path(prefix), node[0]) for prefix, node in candidates], missing
+
+    def __check(self, path, check):
+        """
+        Runs check(path, value) for every value matched by the path, all failures are reported together
+        """
+        values, failures = self.__get_values_by_json_path(path)
+        for value_path, value in values:
+            try:
+                check(value_path, value)
+            except AssertionError as e:
+                failures.append(e.args[0])
+        assert not failures, ', '.join(failures)
 
     def __match(self, path, target):
         def validator():
-            value = self.__get_value_by_json_path(path)
-            assert value == target, '{} doesn\'t match {}'.format(path, target)
+            def check(path, value):
+                assert value == target, '{} doesn\'t match {}'.format(path, target)
+            self.__check(path, check)
         validator.__name__ = '{} == {}'.format(path, target)
         return validator
 
@@ -65,26 +166,47 @@ class Structure:
         validator.__name__ = 'resource {}.{} == {}'.format(id, self.RESOURCE_TYPE_KEY, type)
         return validator
 
+    def __resources(self, types):
+        def validator():
+            resources = self.__body.get(self.RESOURCES_KEY, {})
+            mismatches = []
+            for id, type in types.items():
+                target = resources.get(id)
+                if target is None:
+                    mismatches.append('{} is missing'.format(id))
+                elif target.get(self.RESOURCE_TYPE_KEY) != type:
+                    mismatches.append('{}.{}[{}]!={}'.format(
+                        id,
+                        self.RESOURCE_TYPE_KEY,
+                        target.get(self.RESOURCE_TYPE_KEY),
+                        type
+                    ))
+            assert not mismatches, 'resources mismatch: {}'.format(', '.join(mismatches))
+        validator.__name__ = '{} resources {} match'.format(len(types), self.RESOURCE_TYPE_KEY)
+        return validator
+
     def __len(self, path, target):
         def validator():
-            value = self.__get_value_by_json_path(path)
-            assert len(value) == target, '{}.length[{}]!={}'.format(path, len(value), target)
+            def check(path, value):
+                assert len(value) == target, '{}.length[{}]!={}'.format(path, len(value), target)
+            self.__check(path, check)
         validator.__name__ = '{}.length == {}'.format(path, target)
         return validator
 
     def __exists(self, path):
         def validator():
-            return self.__get_value_by_json_path(path)
+            self.__check(path, lambda path, value: None)
         validator.__name__ = '{} exists?'.format(path)
         return validator
 
     def __not_empty(self, path):
         def validator():
-            value = self.__get_value_by_json_path(path)
-            assert_text = '{} is empty'.format(path)
-            assert value is not None, assert_text
-            if isinstance(value, (str, dict, list)):
-                assert len(value) > 0, assert_text
+            def check(path, value):
+                assert_text = '{} is empty'.format(path)
+                assert value is not None, assert_text
+                if isinstance(value, (str, dict, list)):
+                    assert len(value) > 0, assert_text
+            self.__check(path, check)
         validator.__name__ = 'not empty {}?'.format(path)
         return validator
 
@@ -104,6 +226,13 @@ class Structure:
         self.__validators.append(self.__resource(id, type))
         return self
 
+    def resources(self, types):
+        """
+        Checks types of all resources at once, types is a dict id -> type
+        """
+        self.__validators.append(self.__resources(types))
+        return self
+
     def output(self, id):
         self.__validators.append(self.__output(id))
         return self
@@ -120,13 +249,47 @@ class Structure:
         self.__validators.append(self.__not_empty(path))
         return self
 
+    @staticmethod
+    def __match_target(value):
+        import json
+        # string containing JSON is compared as parsed value
+        try:
+            return json.loads(value)
+        except (TypeError, ValueError):
+            return value
+
+    def apply(self, rules):
+        """
+        Adds validators for the testcase structure rules,
+        rules is a dict: exists, match, resource, output, not_empty, length -> list of rule arguments,
+        resources -> dict id -> type
+        """
+        for path in rules.get('exists', []):
+            self.exists(path)
+        for path, value in rules.get('match', []):
+            self.match(path, self.__match_target(value))
+        for id, type in rules.get('resource', []):
+            self.resource(id, type)
+        if rules.get('resources'):
+            self.resources(rules['resources'])
+        for id in rules.get('output', []):
+            self.output(id)
+        for path in rules.get('not_empty', []):
+            self.not_empty(path)
+        for path, value in rules.get('length', []):
+            self.len(path, value)
+        return self
+
     @property
     def errors(self):
         try:
             return self.__errors
         except AttributeError:
+            import time
             errors = []
+            profile = self.__profile if self.__profile is not None and self.__profile.enabled else None
             for validator in self.__validators:
+                started = time.perf_counter()
                 try:
                     validator()
                 except AssertionError as e:
@@ -139,6 +302,9 @@ class Structure:
                             'msg': msg
                         }
                     )
+                finally:
+                    if profile is not None:
+                        profile.record('rule', self.__filename, time.perf_counter() - started, validator.__name__)
             self.__errors = errors
             return errors
 
@@ -148,11 +314,62 @@ class Structure:
             raise AssertionError(json.dumps(self.errors, indent=4))
 
 
-def structure_test(filename):
-    try:
+class TemplateCache:
+    """
+    Parsed templates shared by the tests of one session, each template is read and parsed once.
+    Size of the template file is used as a memory usage estimate, least recently used templates
+    are evicted when total size exceeds COT_TEST_TEMPLATE_CACHE_SIZE bytes.
+    """
+
+    DEFAULT_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, size_limit=None):
+        import os
+        import collections
+        if size_limit is None:
+            size_limit = int(os.environ.get('COT_TEST_TEMPLATE_CACHE_SIZE', self.DEFAULT_SIZE))
+        self.size_limit = size_limit
+        self.size = 0
+        # filename -> (mtime, size, body)
+        self.templates = collections.OrderedDict()
+
+    def load(self, filename):
+        import os
+        import json
+        key = os.path.normpath(filename)
+        stat = os.stat(filename)
+        try:
+            mtime, size, body = self.templates[key]
+            if mtime == stat.st_mtime_ns and size == stat.st_size:
+                self.templates.move_to_end(key)
+                return body
+            self.__remove(key)
+        except KeyError:
+            pass
         with open(filename, "rt") as f:
-            import json
-            return Structure(json.load(f))
+            body = json.load(f)
+        if stat.st_size <= self.size_limit:
+            self.templates[key] = (stat.st_mtime_ns, stat.st_size, body)
+            self.size += stat.st_size
+            while self.size > self.size_limit:
+                self.__remove(next(iter(self.templates)))
+        return body
+
+    def __remove(self, key):
+        self.size -= self.templates.pop(key)[1]
+
+
+TEMPLATES = TemplateCache()
+
+
+def structure_test(filename, profile=None):
+    import time
+    try:
+        started = time.perf_counter()
+        body = TEMPLATES.load(filename)
+        if profile is not None:
+            profile.record('parse', filename, time.perf_counter() - started)
+        return Structure(body, filename, profile)
     except FileNotFoundError as e:
         raise AssertionError("%s not found" % filename) from e
     except ValueError as e:
@@ -0,0 +1,74 @@
+class BatchCheck:
+    """
+    Checks templates by a tool in batches, so the tool is started once per batch instead of once per template.
+
+    check_batch(filenames) runs the tool once and returns dict normalized filename -> errors
+    for every file of the batch. When batch of filenames is provided all of them are checked
+    by the first errors call and the next calls for the files from the batch use precomputed results.
+    If the batch check fails, files are checked one by one from then on.
+    """
+
+    def __init__(self, kind, check_batch, batch_size, batch=None, cache=None, profile=None):
+        self.kind = kind
+        self.check_batch = check_batch
+        self.batch_size = batch_size
+        self.batch = batch or []
+        self.cache = cache
+        self.profile = profile
+        # precomputed results: normalized filename -> errors
+        self.results = dict()
+        # set after the first failed batch, the batch is not checked again by every next errors call
+        self.single = False
+
+    def check(self, filenames):
+        """
+        Returns dict normalized filename -> errors, cached results are not checked again
+        """
+        import os
+        import time
+        results = dict()
+        keys = dict()
+        not_cached = []
+        for filename in filenames:
+            if self.cache is not None:
+                key, errors = self.cache.get(filename)
+                if errors is not None:
+                    results[os.path.normpath(filename)] = errors
+                    continue
+                keys[os.path.normpath(filename)] = key
+            not_cached.append(filename)
+        for start in range(0, len(not_cached), self.batch_size):
+            batch = not_cached[start:start + self.batch_size]
+            started = time.perf_counter()
+            try:
+                batch_results = self.check_batch(batch)
+            finally:
+                if self.profile is not None:
+                    # batch time is shared equally between its templates
+                    duration = (time.perf_counter() - started) / len(batch)
+                    for filename in batch:
+                        self.profile.record(self.kind, filename, duration, 'batch[%s]' % len(batch))
+            if self.cache is not None:
+                for filename, errors in batch_results.items():
+                    self.cache.set(keys.get(filename), errors)
+            results.update(batch_results)
+        return results
+
+    def errors(self, filename):
+        import os
+        key = os.path.normpath(filename)
+        if key not in self.results:
+            filenames = [filename]
+            for batch_filename in [] if self.single else self.batch:
+                batch_key = os.path.normpath(batch_filename)
+                if batch_key != key and batch_key not in self.results:
+                    filenames.append(batch_filename)
+            try:
+                self.results.update(self.check(filenames))
+            except Exception:
+                if len(filenames) == 1:
+                    raise
+                # one broken file must not fail the tests of the other files
+                self.single = True
+                self.results.update(self.check([filename]))
+        return self.results[key]
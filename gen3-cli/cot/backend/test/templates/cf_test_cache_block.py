@@ -0,0 +1,132 @@
+class ResultCache:
+    """
+    Local cache of the template checks results.
+
+    Result is keyed by the template content hash, tool version, tool command and tool config files content,
+    so unchanged templates are not checked again. Least recently used results are evicted
+    when cache size exceeds COT_TEST_CACHE_SIZE bytes. COT_TEST_NO_CACHE disables the cache.
+    """
+
+    DEFAULT_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, tool, cmd, config_filenames=None):
+        import os
+        self.tool = tool
+        self.cmd = list(cmd)
+        self.config_filenames = config_filenames or []
+        self.enabled = not os.environ.get('COT_TEST_NO_CACHE')
+        self.dir = os.path.join(
+            os.environ.get('COT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'cot')),
+            'test-results',
+            tool
+        )
+        self.size_limit = int(os.environ.get('COT_TEST_CACHE_SIZE', self.DEFAULT_SIZE))
+        self.__salt = None
+        self.__size = None
+
+    @property
+    def salt(self):
+        import hashlib
+        import subprocess
+        if self.__salt is None:
+            salt = hashlib.sha256()
+            version = subprocess.run(
+                [self.cmd[0], '--version'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                encoding='utf8'
+            ).stdout
+            salt.update(version.encode('utf8'))
+            salt.update('\0'.join(self.cmd).encode('utf8'))
+            for filename in self.config_filenames:
+                try:
+                    with open(filename, 'rb') as f:
+                        salt.update(f.read())
+                except OSError:
+                    pass
+            self.__salt = salt.hexdigest()
+        return self.__salt
+
+    def key(self, filename):
+        import hashlib
+        key = hashlib.sha256(self.salt.encode('utf8'))
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                key.update(chunk)
+        return key.hexdigest()
+
+    def __filename(self, key):
+        import os
+        return os.path.join(self.dir, '%s.json' % key)
+
+    def get(self, filename):
+        """
+        Returns (key, result), result is None if there is no cached result
+        """
+        import os
+        import json
+        if not self.enabled:
+            return None, None
+        try:
+            key = self.key(filename)
+        except OSError:
+            # missing file, tool will report the problem
+            return None, None
+        try:
+            with open(self.__filename(key), 'rt') as f:
+                result = json.load(f)
+            # updating mtime to keep recently used results
+            os.utime(self.__filename(key))
+            return key, result
+        except (OSError, ValueError):
+            return key, None
+
+    def set(self, key, result):
+        import os
+        import json
+        if not self.enabled or key is None:
+            return
+        filename = self.__filename(key)
+        tmp_filename = '%s.%s.tmp' % (filename, os.getpid())
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(tmp_filename, 'wt') as f:
+                json.dump(result, f)
+            os.replace(tmp_filename, filename)
+            self.__add_size(os.path.getsize(filename))
+        except OSError:
+            pass
+
+    def __add_size(self, size):
+        import os
+        if self.__size is None:
+            self.__size = sum(entry.stat().st_size for entry in os.scandir(self.dir))
+        else:
+            self.__size += size
+        if self.__size > self.size_limit:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used results until cache takes less than 80% of the size limit
+        """
+        import os
+        entries = []
+        for entry in os.scandir(self.dir):
+            try:
+                stat = entry.stat()
+            except OSError:
+                # removed by a concurrent test process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.size_limit * 0.8:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        self.__size = size
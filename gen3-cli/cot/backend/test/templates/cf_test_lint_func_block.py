@@ -1,22 +1,51 @@
-def lint_test(filename):
+LINT_CMD = [
+    'cfn-lint',
+    '-f',
+    'json'
+]
+LINT_CONFIG_FILENAMES = [
+    '.cfnlintrc',
+    '.cfnlintrc.yaml',
+    '.cfnlintrc.yml'
+]
+# max number of templates linted by a single cfn-lint call
+LINT_BATCH_SIZE = 50
+
+
+def lint_batch(filenames):
+    """
+    Lints templates by one cfn-lint call, returns dict normalized filename -> errors
+    """
+    import os
     import json
     import subprocess
-    cmd = ' '.join([
-        'cfn-lint',
-        '-f',
-        'json',
-        filename
-    ])
     result = subprocess.run(
-        cmd,
-        shell=True,
+        [
+            *LINT_CMD,
+            *filenames
+        ],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         encoding='utf8'
     )
     if result.stderr:
         raise Exception(result.stderr)
-    else:
-        errors = json.loads(result.stdout)
-        if errors:
-            raise AssertionError(json.dumps(errors, indent=4))
+    results = dict()
+    for filename in filenames:
+        results[os.path.normpath(filename)] = []
+    for error in json.loads(result.stdout):
+        results.setdefault(os.path.normpath(error['Filename']), []).append(error)
+    return results
+
+
+def lint_test(filename, check):
+    """
+    check is BatchCheck of lint_batch
+    """
+    import json
+    errors = check.errors(filename)
+    # cached errors may belong to another template with the same content
+    for error in errors:
+        error['Filename'] = filename
+    if errors:
+        raise AssertionError(json.dumps(errors, indent=4))
@@ -0,0 +1,47 @@
+class Profile:
+    """
+    Timings of the test steps, enabled by COT_TEST_PROFILE variable.
+    Records are appended to COT_TEST_PROFILE file as JSON lines when the test process exits.
+    """
+
+    # records kept in memory before they are appended to the file
+    BUFFER_SIZE = 1000
+
+    def __init__(self, filename=None):
+        import os
+        import atexit
+        self.filename = filename or os.environ.get('COT_TEST_PROFILE')
+        self.records = []
+        if self.enabled:
+            atexit.register(self.flush)
+
+    @property
+    def enabled(self):
+        return bool(self.filename)
+
+    def record(self, kind, template, duration, name=None):
+        import os
+        if not self.enabled:
+            return
+        self.records.append(
+            {
+                # "path/to/test.py::test_name (call)"
+                'testcase': os.environ.get('PYTEST_CURRENT_TEST', '').split(' ')[0],
+                'template': template,
+                'kind': kind,
+                'name': name,
+                'duration': duration
+            }
+        )
+        if len(self.records) >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        import json
+        if not self.records:
+            return
+        text = ''.join(json.dumps(record) + '\n' for record in self.records)
+        self.records = []
+        # single append keeps lines of the parallel test processes intact
+        with open(self.filename, 'at') as f:
+            f.write(text)
@@ -0,0 +1,19 @@
+def shard_filenames(tests):
+    """
+    Filenames of the tests which run in the current process.
+    Tests are selected the same way as cot.backend.test.shard pytest plugin does it.
+
+    tests is a dict test name -> filename
+    """
+    import os
+    import zlib
+    shard = os.environ.get('COT_TEST_SHARD')
+    index, count = map(int, shard.split('/')) if shard else (0, 1)
+    # unique filenames in the tests order
+    return list(
+        dict.fromkeys(
+            filename
+            for name, filename in tests.items()
+            if zlib.crc32(name.encode('utf8')) % count == index
+        )
+    )
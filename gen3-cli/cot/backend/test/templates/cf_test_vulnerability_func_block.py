@@ -1,24 +1,57 @@
-def vulnerability_test(filename):
+VULNERABILITY_CMD = [
+    'cfn_nag_scan',
+    '--output-format',
+    'json'
+]
+# max number of templates scanned by a single cfn_nag_scan call
+VULNERABILITY_BATCH_SIZE = 50
+
+
+def vulnerability_batch(filenames):
+    """
+    Scans templates by one cfn_nag_scan call, so ruby and rules are loaded once per batch.
+    Templates are linked into a temporary directory which is used as cfn_nag_scan input path.
+    Returns dict normalized filename -> violations
+    """
+    import os
     import json
+    import tempfile
     import subprocess
-    cmd = ' '.join([
-        'cfn_nag_scan',
-        '--output-format',
-        'json',
-        '--input-path',
-        filename
-    ])
-    result = subprocess.run(
-        cmd,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        encoding='utf8'
-    )
+    with tempfile.TemporaryDirectory() as dir:
+        links = dict()
+        for index, filename in enumerate(filenames):
+            # index prefix keeps templates with the same name apart, extension is used by cfn_nag to find templates
+            link = os.path.join(dir, '%s-%s' % (index, os.path.basename(filename)))
+            os.symlink(os.path.abspath(filename), link)
+            links[os.path.normpath(link)] = os.path.normpath(filename)
+        result = subprocess.run(
+            [
+                *VULNERABILITY_CMD,
+                '--input-path',
+                dir
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding='utf8'
+        )
     if result.stderr:
         raise Exception(result.stderr)
-    else:
-        errors = json.loads(result.stdout)[0]['file_results']['violations']
-        errors = list(e for e in errors if e['type'] != 'WARN')
-        if errors:
-            raise AssertionError(json.dumps(errors, indent=4))
+    results = dict()
+    for file_result in json.loads(result.stdout):
+        filename = links.get(os.path.normpath(file_result['filename']))
+        if filename is not None:
+            results[filename] = file_result['file_results']['violations']
+    missing = [filename for filename in links.values() if filename not in results]
+    if missing:
+        raise Exception('No cfn_nag_scan results for: %s' % ', '.join(missing))
+    return results
+
+
+def vulnerability_test(filename, check):
+    """
+    check is BatchCheck of vulnerability_batch
+    """
+    import json
+    errors = list(e for e in check.errors(filename) if e['type'] != 'WARN')
+    if errors:
+        raise AssertionError(json.dumps(errors, indent=4))
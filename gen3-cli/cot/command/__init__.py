@@ -1,6 +1,34 @@
 import click
+from cot import trace
+from cot.utils import LazyGroup
 
 
-@click.group('root')
+def start_trace(ctx, param, value):
+    if value:
+        trace.start(value)
+        # root context is closed after the invoked command finishes or fails
+        ctx.call_on_close(trace.stop)
+
+
+# groups modules are imported only when the group is invoked
+@click.group(
+    'root',
+    cls=LazyGroup,
+    lazy_commands={
+        'generate': 'cot.command.generate:group',
+        'create': 'cot.command.create:group',
+        'test': 'cot.command.test:group',
+        'manage': 'cot.command.manage:group',
+        'run': 'cot.command.run:group'
+    }
+)
+@click.option(
+    '--trace',
+    type=click.Path(dir_okay=False, writable=True),
+    is_eager=True,
+    expose_value=False,
+    callback=start_trace,
+    help='Write execution trace in Chrome trace-event format to the file'
+)
 def root():
     pass
@@ -30,7 +30,7 @@ def filter_params(option):
         'generation_framework',
         'generation_scenarios',
         'generation_testcase',
-        'deployment_unit'
+        'deployment_units'
     ]
 
 
@@ -1,5 +1,7 @@
 import click
+from tabulate import tabulate
 from cot.backend.create import template as create_template_backend
+from cot.backend.common.exceptions import ScriptTimeoutException
 
 
 @click.command(
@@ -50,8 +52,37 @@ from cot.backend.create import template as create_template_backend
 @click.option(
     '-u',
     '--deployment-unit',
+    'deployment_units',
     help='deployment unit to be included in the template',
-    required=True
+    multiple=True
+)
+@click.option(
+    '--deployment-unit-file',
+    help='file with deployment units, one per line',
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True
+    )
+)
+@click.option(
+    '--workers',
+    help='max number of templates generated in parallel[default: number of CPUs]',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--timeout',
+    help='terminate generation of a deployment unit template and its child processes after the number of seconds',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--log-dir',
+    help='directory for the deployment units logs when multiple units provided',
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True
+    )
 )
 @click.option(
     '-z',
@@ -94,7 +125,14 @@ from cot.backend.create import template as create_template_backend
     '--generation-input-source',
     help='source of input data to use when generating the template'
 )
-def template(**kwargs):
+def template(
+    deployment_units,
+    deployment_unit_file,
+    workers,
+    timeout,
+    log_dir,
+    **kwargs
+):
     """
     Create a CloudFormation (CF) template
 
@@ -106,6 +144,54 @@ def template(**kwargs):
     5. For the "segment" level the "baseline" unit must be deployed before any other unit
     6. When deploying network level components in the "segment" level you must deploy vpc before
     igw, nat, or vpcendpoint
+    7. DEPLOYMENT_UNIT can be repeated and/or listed in DEPLOYMENT_UNIT_FILE(one per line, # for comments).
+       Multiple units generated in parallel, output of each unit is saved in LOG_DIR
 
     """
-    create_template_backend.run(**kwargs, _is_cli=True)
+    deployment_units = list(deployment_units)
+    if deployment_unit_file:
+        deployment_units += read_deployment_unit_file(deployment_unit_file)
+    if not deployment_units:
+        raise click.UsageError('Missing option "-u" / "--deployment-unit" or "--deployment-unit-file".')
+    if len(deployment_units) == 1:
+        try:
+            create_template_backend.run(**kwargs, deployment_unit=deployment_units[0], _is_cli=True, _timeout=timeout)
+        except ScriptTimeoutException as e:
+            raise click.ClickException(str(e)) from e
+        return
+
+    def echo_result(result):
+        status = 'done' if result.returncode == 0 else 'failed'
+        click.echo('[%s] %s' % (status, result.name))
+
+    results = create_template_backend.run_units(
+        **kwargs,
+        deployment_units=deployment_units,
+        workers=workers,
+        timeout=timeout,
+        log_dir=log_dir,
+        on_result=echo_result
+    )
+    click.echo(
+        tabulate(
+            [
+                [result.name, result.returncode, '%.1fs' % result.duration, result.log]
+                for result in results
+            ],
+            ['unit', 'exit code', 'time', 'log'],
+            tablefmt='psql'
+        )
+    )
+    failed = list(result.name for result in results if result.returncode != 0)
+    if failed:
+        raise click.ClickException('Template generation failed for: %s' % ', '.join(failed))
+
+
+def read_deployment_unit_file(filename):
+    units = []
+    with open(filename, 'rt') as f:
+        for line in f:
+            line = line.split('#')[0].strip()
+            if line:
+                units.append(line)
+    return units
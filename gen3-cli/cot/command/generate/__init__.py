@@ -1,15 +1,17 @@
-from cot.command import root as cli
-from .cmdb import group as cmdb_generation_group
-from .product import group as product_generation_group
+import click
+from cot.utils import LazyGroup
 
 
-@cli.group('generate')
+@click.group(
+    'generate',
+    cls=LazyGroup,
+    lazy_commands={
+        'cmdb': 'cot.command.generate.cmdb:group',
+        'product': 'cot.command.generate.product:group'
+    }
+)
 def group():
     """
     Generate various cmdb components
     """
     pass
-
-
-group.add_command(cmdb_generation_group)
-group.add_command(product_generation_group)
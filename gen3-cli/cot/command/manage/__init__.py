@@ -1,20 +1,20 @@
-from cot.command import root as cli
-from .stack import stack as stack_cmd
-from .deployment import deployment as deployment_cmd
-from .crypto import crypto as crypto_cmd
-from .file_crypto import file_crypto as file_crypto_cmd
-from .credentials_crypto import credentials_crypto as credentials_crypto_cmd
+import click
+from cot.utils import LazyGroup
 
 
-@cli.group('manage')
+@click.group(
+    'manage',
+    cls=LazyGroup,
+    lazy_commands={
+        'deployment': 'cot.command.manage.deployment:deployment',
+        'stack': 'cot.command.manage.stack:stack',
+        'stacks': 'cot.command.manage.stacks:stacks',
+        'crypto': 'cot.command.manage.crypto:crypto',
+        'file-crypto': 'cot.command.manage.file_crypto:file_crypto',
+        'credential-crypto': 'cot.command.manage.credentials_crypto:credentials_crypto'
+    }
+)
 def group():
     """
     Manages stuff
     """
-
-
-group.add_command(deployment_cmd)
-group.add_command(stack_cmd)
-group.add_command(crypto_cmd)
-group.add_command(file_crypto_cmd)
-group.add_command(credentials_crypto_cmd)
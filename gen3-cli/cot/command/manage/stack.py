@@ -45,14 +45,7 @@ from cot.backend.manage import stack as manage_stack_backend
     '-l',
     '--level',
     type=click.Choice(
-        [
-            'account',
-            'product',
-            'segment',
-            'solution',
-            'application',
-            'multiple'
-        ],
+        manage_stack_backend.LEVELS,
         case_sensitive=False
     ),
     help='stack level',
@@ -0,0 +1,143 @@
+import click
+from tabulate import tabulate
+from cot.backend.manage import stacks as manage_stacks_backend
+from cot.backend.common.exceptions import UserFriendlyBackendException
+
+
+def parse_dependencies(ctx, param, values):
+    dependencies = dict()
+    for value in values:
+        stack, _, deps = value.partition('=')
+        deps = list(dep.strip() for dep in deps.split(',') if dep.strip())
+        if not stack or not deps:
+            raise click.BadParameter('"%s" must be STACK=STACK[,STACK]' % value)
+        dependencies.setdefault(stack.strip(), []).extend(deps)
+    return dependencies
+
+
+def result_status(result):
+    if result.returncode is None:
+        return 'skipped'
+    if result.returncode == 0:
+        return 'done'
+    return 'failed'
+
+
+@click.command(
+    'stacks',
+    short_help='Manage multiple CloudFormation stacks respecting their dependencies',
+    context_settings=dict(
+        max_content_width=240
+    )
+)
+@click.option(
+    '-s',
+    '--stack',
+    'stacks',
+    multiple=True,
+    required=True,
+    help='stack to manage in LEVEL:DEPLOYMENT_UNIT format, all stacks must be of the same level'
+)
+@click.option(
+    '-a',
+    '--after',
+    'dependencies',
+    multiple=True,
+    callback=parse_dependencies,
+    help='stack dependencies in STACK=STACK[,STACK] format'
+)
+@click.option(
+    '--no-default-dependencies',
+    is_flag=True,
+    help='use only dependencies provided by --after'
+)
+@click.option(
+    '-d',
+    '--delete',
+    help='delete the stacks',
+    is_flag=True
+)
+@click.option(
+    '-w',
+    '--stack-wait',
+    type=click.INT,
+    show_default=True,
+    default=30,
+    help='interval between checking the progress of the stack operation'
+)
+@click.option(
+    '-r',
+    '--region',
+    help='AWS region identifier for the region in which the stacks should be managed'
+)
+@click.option(
+    '-y',
+    '--dryrun',
+    is_flag=True,
+    help='show what will happen without actually updating the stacks'
+)
+@click.option(
+    '--workers',
+    help='max number of stacks managed in parallel[default: number of CPUs]',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--timeout',
+    help='terminate management of a stack and its child processes after the number of seconds',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--log-dir',
+    help='directory for the stacks logs',
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True
+    )
+)
+def stacks(
+    stacks,
+    dependencies,
+    no_default_dependencies,
+    **kwargs
+):
+    """
+    Manage multiple CloudFormation stacks
+
+    \b
+    NOTES:
+    1. All stacks must be of the same level and you must be in the directory
+       corresponding to that level
+    2. Stacks which don't depend on each other are managed in parallel,
+       output of each stack is saved in LOG_DIR
+    3. Default dependencies:
+       - the "baseline" unit is deployed before any other unit of the "segment" level
+       - vpc is deployed before igw, nat and vpcendpoint
+    4. Stacks are deleted in the reversed dependencies order
+    5. Stacks depending on a failed stack are skipped
+    """
+    def echo_result(result):
+        click.echo('[%s] %s' % (result_status(result), result.name))
+
+    try:
+        results = manage_stacks_backend.run(
+            **kwargs,
+            stacks=list(stacks),
+            dependencies=dependencies,
+            use_default_dependencies=not no_default_dependencies,
+            on_result=echo_result
+        )
+    except UserFriendlyBackendException as e:
+        raise click.UsageError(str(e)) from e
+    click.echo(
+        tabulate(
+            [
+                [result.name, result_status(result), result.returncode, '%.1fs' % result.duration, result.log]
+                for result in results
+            ],
+            ['stack', 'status', 'exit code', 'time', 'log'],
+            tablefmt='psql'
+        )
+    )
+    failed = list(result.name for result in results if result.returncode != 0)
+    if failed:
+        raise click.ClickException('Stacks failed or skipped: %s' % ', '.join(failed))
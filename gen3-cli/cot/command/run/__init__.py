@@ -1,20 +1,19 @@
-from cot.command import root as cli
-from .expo_app_publish import expo_app_publish as expo_app_publish_cmd
-from .task import task as task_cmd
-from .lambda_func import lambda_func as lambda_func_cmd
-from .pipeline import pipeline as pipeline_cmd
-from .sentry_release import sentry_release as sentry_release_cmd
+import click
+from cot.utils import LazyGroup
 
 
-@cli.group('run')
+@click.group(
+    'run',
+    cls=LazyGroup,
+    lazy_commands={
+        'expo-app-publish': 'cot.command.run.expo_app_publish:expo_app_publish',
+        'task': 'cot.command.run.task:task',
+        'lambda': 'cot.command.run.lambda_func:lambda_func',
+        'pipeline': 'cot.command.run.pipeline:pipeline',
+        'sentry-release': 'cot.command.run.sentry_release:sentry_release'
+    }
+)
 def group():
     """
     Runs stuff
     """
-
-
-group.add_command(expo_app_publish_cmd)
-group.add_command(task_cmd)
-group.add_command(lambda_func_cmd)
-group.add_command(pipeline_cmd)
-group.add_command(sentry_release_cmd)
@@ -1,15 +1,17 @@
-from cot.command import root as cli
-#  to avoid mock.patch path interpretation issuses
-from .generate import geneate as generate_cmd
-from .run import run as run_cmd
+import click
+from cot.utils import LazyGroup
 
 
-@cli.group('test')
+@click.group(
+    'test',
+    cls=LazyGroup,
+    lazy_commands={
+        'generate': 'cot.command.test.generate:geneate',
+        'run': 'cot.command.test.run:run',
+        'structure': 'cot.command.test.structure:structure'
+    }
+)
 def group():
     """
     Tests stuff
     """
-
-
-group.add_command(generate_cmd)
-group.add_command(run_cmd)
@@ -1,6 +1,7 @@
 import os
 import click
 from cot.backend.test.generate import run as test_generate_backend
+from cot.backend.common.exceptions import UserFriendlyBackendException
 
 
 @click.command(
@@ -45,10 +46,18 @@ from cot.backend.test.generate import run as test_generate_backend
     ),
     help='output file path'
 )
+@click.option(
+    '-i',
+    '--incremental',
+    'incremental',
+    is_flag=True,
+    help='render only testcase files changed since the previous generation'
+)
 def geneate(
     filenames,
     output,
-    directory
+    directory,
+    incremental
 ):
     """
     Used to generate pytests from testcase files.
@@ -64,8 +73,14 @@ def geneate(
     \b
         1. When no files and no directory provided current directory is used to scan for testcase files(depth=1).
         2. Multiple testcase files merged in runtime therefore all testcases must have unique names.
+           Duplicate names are reported with their file and line.
         3. When no output file path provided output will be sent to stdout
         4. Tescase files must have ".testcase.json" extension. Otherwise command will complain and not run.
+        5. Incremental generation requires output file. Rendered testcases are stored next to it
+           in "<output>.manifest.json" and reused while testcase file content doesn't change.
+        6. "resources" checks types of many resources in one rule and reports all mismatches together.
+        7. Paths may contain wildcards "*", "[*]" and resource type filters, e.g. "{AWS::S3::Bucket}".
+           Rule is checked for every matched value: "Resources.{AWS::S3::Bucket}.Properties.Tags[*].Key"
 
     \b
     Testcase file structure:
@@ -103,6 +118,9 @@ def geneate(
                         "resourceType"
                     ]
                 ],
+                "resources":{
+                    "resourceName": "resourceType"
+                },
                 "output":[
                     "outputName"
                 ],
@@ -118,11 +136,17 @@ def geneate(
     }
 
     """
+    if incremental and not output:
+        raise click.UsageError('Incremental generation requires output file')
     directory = os.path.abspath(directory) if directory == '.' else directory
-    result = test_generate_backend(
-        filenames=filenames,
-        output=output,
-        directory=directory
-    )
+    try:
+        result = test_generate_backend(
+            filenames=filenames,
+            output=output,
+            directory=directory,
+            incremental=incremental
+        )
+    except UserFriendlyBackendException as e:
+        raise click.ClickException(str(e)) from e
     if not output:
         click.echo(result)
@@ -29,14 +29,53 @@ from cot.backend.test import run as test_run_backend
     is_flag=True,
     help='minimize pytest output'
 )
-def run(tests, silent):
+@click.option(
+    '--no-cache',
+    'no_cache',
+    is_flag=True,
+    help='do not use cached lint and vulnerability check results'
+)
+@click.option(
+    '-w',
+    '--workers',
+    'workers',
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help='number of pytest processes running tests in parallel'
+)
+@click.option(
+    '-p',
+    '--profile',
+    'profile',
+    type=click.Path(
+        file_okay=True,
+        dir_okay=False
+    ),
+    help='write timings of the test steps to the file, CSV if file has .csv extension otherwise JSON'
+)
+def run(tests, silent, no_cache, workers, profile):
     """
     Discover and run tests in specified files or/and directories. If no tests paths provided
     current directory used as tests discovery root.
+
+    \b
+    Lint and vulnerability check results of the unchanged templates are cached in
+    COT_CACHE_DIR(~/.cache/cot by default), COT_TEST_CACHE_SIZE limits cache size in bytes.
+
+    \b
+    With multiple workers tests are split between pytest processes, each worker stops on its first failure.
+
+    \b
+    Profile contains template parse time, time of each structure rule and lint/vulnerability check time
+    of the generated tests. JSON profile also contains totals per template, slowest first.
     """
     if not tests:
         tests = (os.getcwd(),)
     test_run_backend.run(
         testpaths=tests,
-        silent=silent
+        silent=silent,
+        no_cache=no_cache,
+        workers=workers,
+        profile=profile
     )
@@ -0,0 +1,69 @@
+import os
+import click
+from tabulate import tabulate
+from cot.backend.test.structure import run as test_structure_backend
+
+
+@click.command(
+    'structure',
+    context_settings=dict(
+        max_content_width=240
+    ),
+    short_help='Check testcases structure rules without generating tests'
+)
+@click.option(
+    '-f',
+    '--filename',
+    'filenames',
+    multiple=True,
+    type=click.Path(
+        file_okay=True,
+        dir_okay=False,
+        exists=True
+    ),
+    help='path to testcase file'
+)
+@click.option(
+    '-d',
+    '--directory',
+    'directory',
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        exists=True
+    ),
+    default='.',
+    show_default=True,
+    help='directory to scan for testcase files[depth=1]',
+)
+def structure(
+    filenames,
+    directory
+):
+    """
+    Evaluates "structure" rules of the testcase files against their templates
+    in a single process and reports all failures at once.
+
+    \b
+    Note:
+    \b
+        1. When no files and no directory provided current directory is used to scan for testcase files(depth=1).
+        2. Only structure rules are checked, use "cot test generate" and "cot test run" for lint and
+           vulnerability checks.
+    """
+    directory = os.path.abspath(directory) if directory == '.' else directory
+    results = test_structure_backend(
+        filenames=filenames,
+        directory=directory
+    )
+    errors = [
+        [casename, error['rule'], error['msg']]
+        for casename, case_errors in results
+        for error in case_errors
+    ]
+    if errors:
+        click.echo(tabulate(errors, ['testcase', 'rule', 'error'], tablefmt='psql'))
+        raise click.ClickException(
+            'Structure check failed for: %s' % ', '.join(sorted(set(error[0] for error in errors)))
+        )
+    click.echo('%s testcases passed' % len(results))
@@ -1,3 +1,11 @@
 import os
 
 GENERATION_DIR = os.environ.get('GENERATION_DIR')
+# persistent caches location
+CACHE_DIR = os.environ.get('COT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'cot'))
+# number of persistent bash workers running gen3 scripts, 0 disables workers
+WORKERS = int(os.environ.get('COT_WORKERS', 0))
+# worker is restarted after this number of script calls
+WORKER_MAX_CALLS = int(os.environ.get('COT_WORKER_MAX_CALLS', 100))
+# file sourced once by each worker on start, e.g. shared gen3 setup
+WORKER_INIT = os.environ.get('COT_WORKER_INIT')
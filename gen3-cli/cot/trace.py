@@ -0,0 +1,160 @@
+"""
+Execution trace of the cot invocation in Chrome trace-event format.
+Enabled by "cot --trace FILE", the file can be opened in chrome://tracing or https://ui.perfetto.dev.
+Spans are not recorded while tracing is disabled, so instrumented code pays only for a single check.
+"""
+import os
+import json
+import time
+import threading
+import functools
+import contextlib
+
+
+class Tracer:
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = dict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def now():
+        # microseconds, trace-event timestamps unit
+        return time.perf_counter_ns() / 1000
+
+    def add(self, name, category, started, finished, args=None, tid=None):
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': started,
+            'dur': finished - started,
+            'pid': self.pid,
+            'tid': thread.ident if tid is None else tid,
+            'args': args or {}
+        }
+        with self.lock:
+            self.events.append(event)
+            if tid is None:
+                self.threads[thread.ident] = thread.name
+
+    def metadata(self):
+        events = [
+            {
+                'name': 'process_name',
+                'ph': 'M',
+                'pid': self.pid,
+                'args': {'name': 'cot'}
+            }
+        ]
+        for ident, name in self.threads.items():
+            events.append(
+                {
+                    'name': 'thread_name',
+                    'ph': 'M',
+                    'pid': self.pid,
+                    'tid': ident,
+                    'args': {'name': name}
+                }
+            )
+        return events
+
+    def write(self):
+        with self.lock:
+            events = self.metadata() + sorted(self.events, key=lambda event: event['ts'])
+        with open(self.filename, 'wt') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+__tracer = None
+
+
+def process_age():
+    """
+    Seconds since the current process start, None if it can't be determined
+    """
+    try:
+        with open('/proc/self/stat', 'rt') as f:
+            # process name may contain spaces, fields after it are space separated
+            fields = f.read().rsplit(')', 1)[1].split()
+        started = int(fields[19]) / os.sysconf('SC_CLK_TCK')
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def start(filename):
+    """
+    Starts recording, the time passed since the process start is recorded as startup span
+    """
+    global __tracer
+    __tracer = Tracer(filename)
+    now = __tracer.now()
+    age = process_age()
+    if age is not None:
+        __tracer.add('startup', 'startup', now - age * 1000000, now)
+
+
+def stop():
+    """
+    Writes recorded spans to the trace file and stops recording
+    """
+    global __tracer
+    tracer = __tracer
+    __tracer = None
+    if tracer is not None:
+        tracer.write()
+
+
+def enabled():
+    return __tracer is not None
+
+
+def now():
+    return Tracer.now()
+
+
+def add(name, category, started, args=None, tid=None):
+    """
+    Records span started at given now() timestamp and finished now
+    """
+    tracer = __tracer
+    if tracer is not None:
+        tracer.add(name, category, started, tracer.now(), args, tid)
+
+
+@contextlib.contextmanager
+def span(name, category='cot', **args):
+    """
+    Records the enclosed code as a span. Yields args dict which can be extended by the code.
+    """
+    if __tracer is None:
+        yield args
+        return
+    started = now()
+    try:
+        yield args
+    except BaseException as e:
+        args['error'] = type(e).__name__
+        raise
+    finally:
+        add(name, category, started, args)
+
+
+def traced(name, category='cot'):
+    """
+    Decorator recording every function call as a span
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if __tracer is None:
+                return func(*args, **kwargs)
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,4 +1,33 @@
+import importlib
 import click
+from cot import trace
+
+
+class LazyGroup(click.Group):
+    """
+    Group which imports subcommand module only when the subcommand is requested.
+    lazy_commands is a dict: command name -> "path.to.module:command_attribute"
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_commands:
+            module_name, attribute = self.lazy_commands[name].split(':')
+            with trace.span('import %s' % module_name, 'import'):
+                module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attribute), name)
+        return super().get_command(ctx, name)
+
+    def invoke(self, ctx):
+        # span of the innermost group includes the invoked command
+        with trace.span('dispatch %s' % ctx.command_path, 'dispatch'):
+            return super().invoke(ctx)
 
 
 class DynamicCommand(click.Command):
@@ -0,0 +1,80 @@
+import os
+import time
+import tempfile
+from unittest import mock
+from cot.backend.common.index import CMDBIndex
+from cot.backend.common.context import RootLevel
+
+
+def touch(*path):
+    os.makedirs(os.path.join(*path[:-1]), exist_ok=True)
+    with open(os.path.join(*path), 'wt') as f:
+        f.write('{}')
+
+
+def test_index():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache:
+        touch(root, 'root.json')
+        touch(root, 'accounts', 'tenant.json')
+        touch(root, 'accounts', 'a', 'config', 'account.json')
+        touch(root, '.git', 'account.json')
+        index_filename = os.path.join(cache, 'index.json')
+
+        index = CMDBIndex(root, ['root.json', 'tenant.json', 'account.json'], index_filename)
+        index.refresh()
+        assert index.find('tenant.json') == [os.path.join(root, 'accounts', 'tenant.json')]
+        assert index.find('account.json') == [os.path.join(root, 'accounts', 'a', 'config', 'account.json')]
+        assert os.path.exists(index_filename)
+
+        # unchanged directories are not listed again
+        touch(root, 'accounts', 'b', 'config', 'account.json')
+        index = CMDBIndex(root, ['root.json', 'tenant.json', 'account.json'], index_filename)
+        index.load()
+        with mock.patch('os.scandir', wraps=os.scandir) as scandir:
+            index.refresh()
+            scanned = set(call[0][0] for call in scandir.call_args_list)
+        assert scanned == {
+            os.path.join(root, 'accounts'),
+            os.path.join(root, 'accounts', 'b'),
+            os.path.join(root, 'accounts', 'b', 'config')
+        }
+        assert len(index.find('account.json')) == 2
+
+        os.remove(os.path.join(root, 'accounts', 'a', 'config', 'account.json'))
+        index.refresh()
+        assert index.find('account.json') == [os.path.join(root, 'accounts', 'b', 'config', 'account.json')]
+
+
+def test_context_uses_index():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache:
+        touch(root, 'root.json')
+        touch(root, 'accounts', 'tenant.json')
+        with mock.patch('cot.env.CACHE_DIR', cache), mock.patch('os.walk') as walk:
+            assert RootLevel(root).root == root
+            assert walk.call_count == 0
+        assert os.listdir(os.path.join(cache, 'cmdb-index'))
+
+
+def test_get_sees_new_files():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache:
+        touch(root, 'root.json')
+        with mock.patch('cot.env.CACHE_DIR', cache):
+            assert CMDBIndex.get(root, ['root.json', 'account.json']).find('account.json') == []
+            touch(root, 'a', 'account.json')
+            assert CMDBIndex.get(root, ['root.json', 'account.json'], max_age=0).find('account.json') == [
+                os.path.join(root, 'a', 'account.json')
+            ]
+            touch(root, 'b', 'account.json')
+            with mock.patch('time.monotonic', return_value=time.monotonic() + CMDBIndex.REFRESH_INTERVAL):
+                assert len(CMDBIndex.get(root, ['root.json', 'account.json']).find('account.json')) == 2
+
+
+def test_get_refreshes_once_per_interval():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as cache:
+        touch(root, 'root.json')
+        touch(root, 'accounts', 'tenant.json')
+        refresh = mock.patch.object(CMDBIndex, 'refresh', autospec=True, side_effect=CMDBIndex.refresh)
+        with mock.patch('cot.env.CACHE_DIR', cache), refresh as refresh:
+            for i in range(3):
+                RootLevel(root)
+            assert refresh.call_count == 1
@@ -0,0 +1,59 @@
+import threading
+import pytest
+from unittest import mock
+from cot.backend.common import parallel
+
+
+def test_interrupted_pool_cancels_tasks():
+    cancel = threading.Event()
+    started = threading.Event()
+    cancelled = []
+
+    def interrupted():
+        started.wait(5)
+        raise KeyboardInterrupt()
+
+    def running():
+        started.set()
+        cancelled.append(cancel.wait(5))
+        return parallel.TaskResult('running', None, 'cancelled', None, 0)
+
+    for run in (
+        lambda tasks: parallel.run_pool(tasks, workers=2, cancel=cancel),
+        lambda tasks: parallel.run_graph(tasks, {}, workers=2, cancel=cancel)
+    ):
+        cancel.clear()
+        started.clear()
+        with pytest.raises(KeyboardInterrupt):
+            run({'running': running, 'interrupted': interrupted})
+        assert cancelled.pop() is True
+
+
+def test_run_logged_serializes_writes(tmp_path):
+    active = []
+    overlapped = []
+
+    def write(text):
+        overlapped.append(bool(active))
+        active.append(text)
+        threading.Event().wait(0.001)
+        active.remove(text)
+
+    def output(callback):
+        for i in range(50):
+            callback('line\n')
+
+    def func(_on_stdout, _on_stderr, **kwargs):
+        threads = [threading.Thread(target=output, args=(callback,)) for callback in (_on_stdout, _on_stderr)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    log = mock.MagicMock()
+    log.__enter__.return_value.write.side_effect = write
+    with mock.patch('builtins.open', return_value=log):
+        result = parallel.run_logged('task', func, str(tmp_path))
+    assert result.returncode == 0
+    assert len(overlapped) == 100
+    assert not any(overlapped)
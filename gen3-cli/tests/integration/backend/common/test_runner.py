@@ -0,0 +1,243 @@
+import os
+import time
+import signal
+import asyncio
+import tempfile
+import threading
+import subprocess
+from unittest import mock
+import pytest
+from cot.backend.common import runner
+from cot.backend.common.exceptions import (
+    BackendException,
+    ScriptException,
+    ScriptTimeoutException,
+    ScriptCancelledException
+)
+
+
+def test_large_output_does_not_block(generation_dir):
+    # output is much bigger than the pipe buffer
+    generation_dir(
+        'large.sh',
+        'for i in $(seq 1 20000); do echo "out $i"; echo "err $i" >&2; done\n'
+    )
+    lines = []
+    runner.run('large.sh', [], {}, False, on_stdout=lines.append)
+    assert len(lines) == 20000
+    assert lines[0] == 'out 1\n'
+    assert lines[-1] == 'out 20000\n'
+
+
+def test_error_contains_stderr_tail(generation_dir):
+    generation_dir(
+        'fail.sh',
+        'for i in $(seq 1 1000); do echo "err $i" >&2; done\nexit 1\n'
+    )
+    with pytest.raises(BackendException) as info:
+        runner.run('fail.sh', [], {}, False, tail=2)
+    assert str(info.value) == 'err 999\nerr 1000\n'
+
+
+def test_callback_error_reraised(generation_dir):
+    generation_dir('echo.sh', 'echo "$@"\n')
+
+    def callback(line):
+        raise ValueError(line)
+
+    with pytest.raises(ValueError):
+        runner.run('echo.sh', ['arg'], {'-f': True, '-o': 'value'}, False, on_stdout=callback)
+
+
+def test_arguments_are_not_split(generation_dir):
+    generation_dir('args.sh', 'for arg in "$@"; do echo "[$arg]"; done\n')
+    lines = []
+    runner.run('args.sh', ['with space', '$HOME'], {'-o': 'a b'}, False, on_stdout=lines.append)
+    assert lines == ['[-o]\n', '[a b]\n', '[with space]\n', '[$HOME]\n']
+
+
+@pytest.mark.benchmark
+def test_spawn_overhead(generation_dir):
+    """
+    Micro-benchmark: direct exec must not be slower than the previously used "/bin/bash -c" call line
+    """
+    script = generation_dir('noop.sh', 'exit 0\n')
+    calls = 20
+
+    def measure(func):
+        # best of several rounds reduces noise of the loaded CI machines
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            for _ in range(calls):
+                func()
+            timings.append((time.perf_counter() - started) / calls)
+        return min(timings)
+
+    direct = measure(lambda: runner.run('noop.sh', [], {}, False))
+    shell = measure(lambda: subprocess.run(['/bin/bash', '-c', script], check=True))
+    print('spawn overhead per call: direct %.2fms, bash -c %.2fms' % (direct * 1000, shell * 1000))
+    # generous margin, direct call also starts output draining threads
+    assert direct < shell * 1.5
+
+
+def test_returncode(generation_dir):
+    generation_dir('exit.sh', 'exit 3\n')
+    generation_dir('killed.sh', 'kill -TERM $$\n')
+    # python 3.8 compatible status decoding
+    with mock.patch('cot.env.WORKERS', 0), mock.patch.object(os, 'waitstatus_to_exitcode', None, create=True):
+        with pytest.raises(ScriptException) as info:
+            runner.run('exit.sh', [], {}, False)
+        assert info.value.returncode == 3
+        with pytest.raises(ScriptException) as info:
+            runner.run('killed.sh', [], {}, False)
+        assert info.value.returncode == -signal.SIGTERM
+        assert runner.run('exit.sh', [], {}, True).returncode == 3
+
+
+def test_undecodable_output(generation_dir):
+    generation_dir('binary.sh', "printf 'ok\\n\\377\\376\\n'\necho after\n")
+    for workers in (0, 1):
+        lines = []
+        with mock.patch('cot.env.WORKERS', workers):
+            result = runner.run('binary.sh', [], {}, False, on_stdout=lines.append)
+        assert result.returncode == 0
+        assert lines == ['ok\n', '\ufffd\ufffd\n', 'after\n']
+        assert result.stdout == 'ok\n\ufffd\ufffd\nafter\n'
+
+
+def test_drain_error():
+    stream = mock.Mock(readline=mock.Mock(side_effect=['line\n', UnicodeDecodeError('utf-8', b'\xff', 0, 1, '')]))
+    capture = runner.StreamCapture(stream)
+    capture.start()
+    with pytest.raises(UnicodeDecodeError):
+        capture.join()
+    assert capture.text == 'line\n'
+    stream.close.assert_called_once()
+
+
+def test_wait_error(generation_dir):
+    generation_dir('noop.sh', 'exit 0\n')
+    with mock.patch('cot.env.WORKERS', 0), mock.patch('os.wait4', side_effect=ChildProcessError()):
+        with pytest.raises(BackendException) as info:
+            runner.run('noop.sh', [], {}, False)
+    assert isinstance(info.value.__cause__, ChildProcessError)
+
+
+def test_not_started(generation_dir):
+    script = generation_dir('not_executable.sh', 'exit 0\n')
+    os.chmod(script, 0o644)
+    # the same exit codes as reported by bash
+    with pytest.raises(ScriptException) as info:
+        runner.run('missing.sh', [], {}, False)
+    assert info.value.returncode == 127
+    with pytest.raises(ScriptException) as info:
+        runner.run('not_executable.sh', [], {}, False)
+    assert info.value.returncode == 126
+    with pytest.raises(ScriptException) as info:
+        asyncio.run(runner.run_async('missing.sh', [], {}))
+    assert info.value.returncode == 127
+
+
+def is_running(pid):
+    try:
+        with open('/proc/%s/stat' % pid, 'rt') as f:
+            # zombies are not reaped if there is no init process in container
+            return f.read().split(')')[-1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def test_timeout_terminates_process_group(generation_dir):
+    with tempfile.TemporaryDirectory() as dir:
+        pidfile = os.path.join(dir, 'pid')
+        generation_dir('slow.sh', 'sleep 30 &\necho $! > "%s"\nwait\n' % pidfile)
+        started = time.monotonic()
+        with pytest.raises(ScriptTimeoutException) as info:
+            runner.run('slow.sh', [], {}, False, timeout=0.5)
+        assert time.monotonic() - started < 5
+        assert info.value.returncode == -signal.SIGTERM
+        with open(pidfile, 'rt') as f:
+            pid = int(f.read())
+        assert not is_running(pid)
+
+
+def test_cli_timeout_terminates_process_tree(generation_dir):
+    with tempfile.TemporaryDirectory() as dir:
+        pidfile = os.path.join(dir, 'pid')
+        # grandchild of the script
+        generation_dir('slow.sh', 'bash -c \'sleep 30 & echo $! > "%s"; wait\' &\nwait\n' % pidfile)
+        with pytest.raises(ScriptTimeoutException):
+            runner.run('slow.sh', [], {}, True, timeout=0.5)
+        with open(pidfile, 'rt') as f:
+            pid = int(f.read())
+        assert not is_running(pid)
+
+
+def test_cli_script_stays_in_current_group(generation_dir):
+    with tempfile.TemporaryDirectory() as dir:
+        pgidfile = os.path.join(dir, 'pgid')
+        generation_dir('group.sh', 'ps -o pgid= -p $$ > "%s"\n' % pgidfile)
+        runner.run('group.sh', [], {}, True)
+        with open(pgidfile, 'rt') as f:
+            assert int(f.read()) == os.getpgrp()
+
+
+def test_finished_script_background_processes_are_kept(generation_dir):
+    with tempfile.TemporaryDirectory() as dir:
+        pidfile = os.path.join(dir, 'pid')
+        generation_dir('background.sh', 'sleep 30 > /dev/null 2>&1 &\necho $! > "%s"\n' % pidfile)
+        for is_cli in (True, False):
+            with mock.patch('cot.env.WORKERS', 0):
+                runner.run('background.sh', [], {}, is_cli)
+            with open(pidfile, 'rt') as f:
+                pid = int(f.read())
+            try:
+                assert is_running(pid)
+            finally:
+                os.kill(pid, signal.SIGKILL)
+
+
+def test_terminate_kills_ignoring_processes(generation_dir):
+    # SIGTERM is ignored by the script and its children
+    generation_dir('stubborn.sh', 'trap "" TERM\nsleep 30\n')
+    with mock.patch.object(runner, 'TERMINATE_TIMEOUT', 0.2), mock.patch('cot.env.WORKERS', 0):
+        with pytest.raises(ScriptTimeoutException) as info:
+            runner.run('stubborn.sh', [], {}, False, timeout=0.2)
+    assert info.value.returncode == -signal.SIGKILL
+
+
+def test_cancel(generation_dir):
+    generation_dir('slow.sh', 'echo started >&2\nsleep 30\n')
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    with pytest.raises(ScriptCancelledException) as info:
+        runner.run('slow.sh', [], {}, False, cancel=cancel)
+    assert str(info.value) == 'Script cancelled\nstarted\n'
+    # set event cancels the script right after start
+    with pytest.raises(ScriptCancelledException):
+        runner.run('slow.sh', [], {}, False, cancel=cancel)
+
+
+def test_result(generation_dir):
+    generation_dir(
+        'busy.sh',
+        'x=$(head -c 20000000 /dev/zero | tr "\\0" x)\n'
+        'for i in $(seq 1 100000); do :; done\n'
+        'echo done\necho warning >&2\n'
+    )
+    generation_dir('fail.sh', 'echo failed >&2\nexit 2\n')
+    # resource usage is collected only for the directly started scripts
+    with mock.patch('cot.env.WORKERS', 0):
+        result = runner.run('busy.sh', [], {}, False)
+        with pytest.raises(BackendException) as info:
+            runner.run('fail.sh', [], {}, False)
+    assert result.returncode == 0
+    assert result.stdout == 'done\n'
+    assert result.stderr == 'warning\n'
+    assert 0 < result.cpu_time <= result.wall_time * 1.5
+    # bash keeps the whole string in memory
+    assert result.max_rss > 20000000
+    assert info.value.result.returncode == 2
+    assert info.value.result.stderr == 'failed\n'
+    assert info.value.result.cpu_time is not None
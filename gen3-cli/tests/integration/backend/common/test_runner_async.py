@@ -0,0 +1,102 @@
+import os
+import time
+import signal
+import asyncio
+import tempfile
+from unittest import mock
+import pytest
+from cot.backend.common import runner
+from cot.backend.common.exceptions import BackendException, ScriptTimeoutException
+from .test_runner import is_running
+
+
+def test_output_streamed(generation_dir):
+    # long line exceeds the default asyncio stream limit
+    generation_dir(
+        'large.sh',
+        'for i in $(seq 1 20000); do echo "out $i"; echo "err $i" >&2; done\n'
+        'head -c 200000 /dev/zero | tr "\\0" x\n'
+    )
+    lines = []
+    asyncio.run(runner.run_async('large.sh', [], {}, on_stdout=lines.append))
+    assert len(lines) == 20001
+    assert lines[0] == 'out 1\n'
+    assert lines[-1] == 'x' * 200000
+
+
+def test_error_contains_stderr_tail(generation_dir):
+    generation_dir(
+        'fail.sh',
+        'for i in $(seq 1 1000); do echo "err $i" >&2; done\nexit 1\n'
+    )
+    with pytest.raises(BackendException) as info:
+        asyncio.run(runner.run_async('fail.sh', [], {}, tail=2))
+    assert str(info.value) == 'err 999\nerr 1000\n'
+    assert info.value.returncode == 1
+
+
+def test_concurrent_calls(generation_dir):
+    generation_dir('slow.sh', 'sleep 0.5\necho "$@"\n')
+    lines = []
+
+    async def main():
+        await asyncio.gather(*(
+            runner.run_async('slow.sh', [str(i)], {}, on_stdout=lines.append)
+            for i in range(20)
+        ))
+
+    started = time.monotonic()
+    asyncio.run(main())
+    # calls do not wait for each other
+    assert time.monotonic() - started < 5
+    assert sorted(lines) == sorted('%s\n' % i for i in range(20))
+
+
+def test_timeout_terminates_process_group(generation_dir):
+    with tempfile.TemporaryDirectory() as dir:
+        pidfile = os.path.join(dir, 'pid')
+        generation_dir('slow.sh', 'sleep 30 &\necho $! > "%s"\nwait\n' % pidfile)
+        with pytest.raises(ScriptTimeoutException) as info:
+            asyncio.run(runner.run_async('slow.sh', [], {}, timeout=0.5))
+        assert info.value.returncode == -signal.SIGTERM
+        with open(pidfile, 'rt') as f:
+            pid = int(f.read())
+        assert not is_running(pid)
+
+
+def test_terminate_kills_ignoring_processes(generation_dir):
+    generation_dir('stubborn.sh', 'trap "" TERM\nsleep 30\n')
+    with mock.patch.object(runner, 'TERMINATE_TIMEOUT', 0.2):
+        with pytest.raises(ScriptTimeoutException) as info:
+            asyncio.run(runner.run_async('stubborn.sh', [], {}, timeout=0.2))
+    assert info.value.returncode == -signal.SIGKILL
+
+
+def test_task_cancel(generation_dir):
+    with tempfile.TemporaryDirectory() as dir:
+        pidfile = os.path.join(dir, 'pid')
+        generation_dir('slow.sh', 'echo $$ > "%s"\nsleep 30\n' % pidfile)
+
+        async def main():
+            task = asyncio.ensure_future(runner.run_async('slow.sh', [], {}))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        started = time.monotonic()
+        asyncio.run(main())
+        assert time.monotonic() - started < 5
+        with open(pidfile, 'rt') as f:
+            pid = int(f.read())
+        assert not is_running(pid)
+
+
+def test_result(generation_dir):
+    generation_dir('echo.sh', 'echo "$@"\necho warning >&2\n')
+    result = asyncio.run(runner.run_async('echo.sh', ['arg'], {}))
+    assert result.returncode == 0
+    assert result.stdout == 'arg\n'
+    assert result.stderr == 'warning\n'
+    assert result.wall_time > 0
+    assert result.cpu_time is None
@@ -0,0 +1,57 @@
+import os
+import json
+import tempfile
+from unittest import mock
+import pytest
+from cot import trace
+from cot.backend.common import runner
+from cot.backend.common.context import RootLevel
+from cot.backend.common.exceptions import BackendException
+from .test_index import touch
+
+
+def spans(filename):
+    with open(filename, 'rt') as f:
+        return [event for event in json.load(f)['traceEvents'] if event['ph'] == 'X']
+
+
+def test_runner_and_context_spans(generation_dir):
+    generation_dir('echo.sh', 'echo "$@"\n')
+    generation_dir('fail.sh', 'exit 3\n')
+    with tempfile.TemporaryDirectory() as dir:
+        root = os.path.join(dir, 'cmdb')
+        touch(root, 'root.json')
+        touch(root, 'accounts', 'tenant.json')
+        filename = os.path.join(dir, 'trace.json')
+        trace.start(filename)
+        try:
+            with mock.patch('cot.env.CACHE_DIR', dir), mock.patch('cot.env.WORKERS', 0):
+                RootLevel(root)
+                runner.run('echo.sh', ['arg'], {}, False)
+                with pytest.raises(BackendException):
+                    runner.run('fail.sh', [], {}, False)
+        finally:
+            trace.stop()
+        assert not trace.enabled()
+        events = {event['name']: event for event in spans(filename)}
+    echo = events['runner.run echo.sh']
+    assert echo['cat'] == 'subprocess'
+    assert echo['args']['returncode'] == 0
+    assert echo['args']['cpu_time'] is not None
+    assert echo['args']['stdout'] is None
+    assert events['runner.run fail.sh']['args'] == {'script': 'fail.sh', 'returncode': 3, 'error': 'ScriptException'}
+    assert events['Context']['args'] == {'level': 'root', 'dir': root}
+    assert events['Search.upwards']['cat'] == 'search'
+    # nested span is inside its parent
+    context = events['Context']
+    upwards = events['Search.upwards']
+    assert context['ts'] <= upwards['ts']
+    assert upwards['ts'] + upwards['dur'] <= context['ts'] + context['dur']
+
+
+def test_disabled():
+    assert not trace.enabled()
+    with trace.span('name') as args:
+        args['key'] = 'value'
+    # nothing to write
+    trace.stop()
@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+from unittest import mock
+import pytest
+from cot.backend.common import runner, workers
+from cot.backend.common.exceptions import ScriptException, WorkerException, ScriptTimeoutException
+
+
+@pytest.fixture()
+def pool():
+    pool = workers.WorkerPool(2, max_calls=3)
+    with mock.patch('cot.env.WORKERS', 2), mock.patch.object(workers, 'get_pool', return_value=pool):
+        yield pool
+    pool.close()
+
+
+def run(script, args=None, options=None):
+    lines = []
+    runner.run(script, args or [], options or {}, False, on_stdout=lines.append)
+    return lines
+
+
+def test_worker_reuse(generation_dir, pool):
+    # $$ is the worker pid in the script subshell
+    generation_dir('pid.sh', 'echo $$\n')
+    pids = [run('pid.sh')[0] for _ in range(5)]
+    # worker is restarted after 3 calls
+    assert len(set(pids)) == 2
+    assert pids[:3] == [pids[0]] * 3
+    assert pool.started == 1
+
+
+def test_worker_call(generation_dir, pool):
+    generation_dir('args.sh', 'for arg in "$@"; do echo "[$arg]"; done\necho "$(basename "$0")"\nprintf no-newline\n')
+    assert run('args.sh', ['with space', '$HOME'], {'-o': 'a b'}) == [
+        '[-o]\n', '[a b]\n', '[with space]\n', '[$HOME]\n', 'args.sh\n', 'no-newline'
+    ]
+    generation_dir('fail.sh', 'for i in $(seq 1 10); do echo "err $i" >&2; done\nexit 3\n')
+    with pytest.raises(ScriptException) as info:
+        runner.run('fail.sh', [], {}, False, tail=2)
+    assert info.value.returncode == 3
+    assert str(info.value) == 'err 9\nerr 10\n'
+    # state of the script doesn't leak into the next calls
+    generation_dir('state.sh', 'echo "[${STATE}]"\nSTATE=changed\ncd /\n')
+    with tempfile.TemporaryDirectory() as dir:
+        cwd = os.getcwd()
+        os.chdir(dir)
+        try:
+            generation_dir('cwd.sh', 'pwd\n')
+            assert run('cwd.sh') == [os.path.realpath(dir) + '\n']
+            assert run('state.sh') == ['[]\n']
+            assert run('state.sh') == ['[]\n']
+            assert run('cwd.sh') == [os.path.realpath(dir) + '\n']
+        finally:
+            os.chdir(cwd)
+
+
+def test_worker_init(generation_dir):
+    init = generation_dir('init.sh', 'function greet() { echo "hello $1"; }\n')
+    generation_dir('greet.sh', 'greet "$1"\n')
+    pool = workers.WorkerPool(1, init=init)
+    try:
+        with mock.patch('cot.env.WORKERS', 1), mock.patch.object(workers, 'get_pool', return_value=pool):
+            assert run('greet.sh', ['world']) == ['hello world\n']
+    finally:
+        pool.close()
+
+
+def test_broken_worker(generation_dir, pool):
+    generation_dir('kill.sh', 'kill -9 $$\n')
+    generation_dir('echo.sh', 'echo ok\n')
+    with pytest.raises(WorkerException):
+        run('kill.sh')
+    assert pool.started == 0
+    assert run('echo.sh') == ['ok\n']
+
+
+def test_health_check(generation_dir, pool):
+    generation_dir('pid.sh', 'echo $$\n')
+    pid = run('pid.sh')[0]
+    worker = pool.idle[0]
+    with mock.patch.object(workers, 'HEALTH_CHECK_INTERVAL', -1):
+        assert worker.healthy()
+        assert run('pid.sh') == [pid]
+        worker.process.kill()
+        worker.process.wait()
+        assert not worker.healthy()
+        assert run('pid.sh') != [pid]
+    pid = run('pid.sh')[0]
+    # environment changed after worker start
+    with mock.patch.dict(os.environ, {'COT_TEST_WORKER_ENV': '1'}):
+        assert run('pid.sh') != [pid]
+
+
+def test_not_bash_script(generation_dir, pool):
+    script = generation_dir('script.py', '')
+    with open(script, 'wt') as f:
+        f.write('#!%s\nprint("python")\n' % sys.executable)
+    assert run('script.py') == ['python\n']
+    assert pool.started == 0
+    script = generation_dir('not_executable.sh', 'exit 0\n')
+    os.chmod(script, 0o644)
+    assert not pool.accepts(script)
+
+
+def test_worker_timeout(generation_dir, pool):
+    generation_dir('slow.sh', 'sleep 30\n')
+    generation_dir('echo.sh', 'echo ok\n')
+    with pytest.raises(ScriptTimeoutException):
+        runner.run('slow.sh', [], {}, False, timeout=0.3)
+    # timed out worker is terminated and replaced
+    assert pool.started == 0
+    assert run('echo.sh') == ['ok\n']
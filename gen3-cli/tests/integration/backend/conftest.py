@@ -0,0 +1,24 @@
+import os
+import stat
+import tempfile
+from unittest import mock
+import pytest
+
+
+@pytest.fixture()
+def generation_dir():
+    """
+    Temporary GENERATION_DIR. Returns function which creates executable bash scripts in it.
+    """
+    with tempfile.TemporaryDirectory() as dir:
+
+        def create_script(name, body):
+            filename = os.path.join(dir, name)
+            with open(filename, 'wt') as f:
+                f.write('#!/bin/bash\n')
+                f.write(body)
+            os.chmod(filename, os.stat(filename).st_mode | stat.S_IEXEC)
+            return filename
+
+        with mock.patch('cot.env.GENERATION_DIR', dir):
+            yield create_script
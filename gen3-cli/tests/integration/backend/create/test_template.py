@@ -0,0 +1,84 @@
+import os
+import asyncio
+import signal
+import tempfile
+from cot.backend.create import template as create_template_backend
+
+
+def test_run_units(generation_dir):
+    generation_dir(
+        'createTemplate.sh',
+        'while getopts ":c:d:f:l:p:q:u:" opt; do\n'
+        '  case $opt in\n'
+        '    u) UNIT="$OPTARG" ;;\n'
+        '  esac\n'
+        'done\n'
+        'echo "generating $UNIT"\n'
+        '[[ "$UNIT" == "bad" ]] && { echo "bad unit" >&2; exit 3; }\n'
+        'exit 0\n'
+    )
+    finished = []
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = create_template_backend.run_units(
+            deployment_units=['vpc', 'bad', 'igw'],
+            level='segment',
+            workers=2,
+            log_dir=log_dir,
+            on_result=finished.append
+        )
+        assert [r.name for r in results] == ['vpc', 'bad', 'igw']
+        assert [r.returncode for r in results] == [0, 3, 0]
+        assert results[1].error == 'bad unit\n'
+        assert [r.result.returncode for r in results] == [0, 3, 0]
+        assert len(finished) == 3
+        with open(os.path.join(log_dir, 'vpc.log')) as f:
+            assert f.read() == 'generating vpc\n'
+
+
+def test_run_units_missing_script(generation_dir):
+    # start failure of one unit does not abort the others
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = create_template_backend.run_units(deployment_units=['vpc', 'igw'], log_dir=log_dir)
+    assert [r.returncode for r in results] == [127, 127]
+    assert 'createTemplate.sh' in results[0].error
+
+
+def test_run_units_timeout(generation_dir):
+    generation_dir(
+        'createTemplate.sh',
+        'while getopts ":c:d:f:l:p:q:u:" opt; do\n'
+        '  case $opt in\n'
+        '    u) UNIT="$OPTARG" ;;\n'
+        '  esac\n'
+        'done\n'
+        '[[ "$UNIT" == "slow" ]] && sleep 30\n'
+        'exit 0\n'
+    )
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = create_template_backend.run_units(
+            deployment_units=['slow', 'fast'],
+            level='segment',
+            timeout=0.5,
+            log_dir=log_dir
+        )
+        assert [r.returncode for r in results] == [-signal.SIGTERM, 0]
+        assert results[0].error.startswith('Script timed out after 0.5s')
+
+
+def test_run_units_empty():
+    assert create_template_backend.run_units() == []
+    assert create_template_backend.run_units(deployment_units=[]) == []
+
+
+def test_run_async(generation_dir):
+    generation_dir('createTemplate.sh', 'echo "$@"\n')
+    lines = []
+    result = asyncio.run(
+        create_template_backend.run_async(
+            deployment_unit='vpc',
+            level='segment',
+            _on_stdout=lines.append
+        )
+    )
+    assert lines == ['-l segment -u vpc\n']
+    assert result.stdout == '-l segment -u vpc\n'
@@ -0,0 +1,74 @@
+import tempfile
+import pytest
+from cot.backend.manage import stacks as manage_stacks_backend
+from cot.backend.common.exceptions import UserFriendlyBackendException
+
+
+MANAGE_STACK_SCRIPT = (
+    'while getopts ":dl:u:w:" opt; do\n'
+    '  case $opt in\n'
+    '    d) DELETE=1 ;;\n'
+    '    l) LEVEL="$OPTARG" ;;\n'
+    '    u) UNIT="$OPTARG" ;;\n'
+    '  esac\n'
+    'done\n'
+    '[[ "$UNIT" == "bad" ]] && exit 1\n'
+    'echo "$LEVEL:$UNIT" >> "$(dirname "$0")/order"\n'
+)
+
+
+def test_build_graph():
+    graph = manage_stacks_backend.build_graph(
+        [
+            'segment:baseline',
+            'segment:vpc',
+            'segment:igw',
+            'segment:eip'
+        ]
+    )
+    assert graph['segment:baseline'] == set()
+    assert graph['segment:vpc'] == {'segment:baseline'}
+    assert graph['segment:igw'] == {'segment:baseline', 'segment:vpc'}
+    assert graph['segment:eip'] == {'segment:baseline'}
+
+    graph = manage_stacks_backend.build_graph(
+        ['segment:vpc', 'segment:igw'],
+        {'segment:vpc': ['segment:igw']},
+        use_default_dependencies=False
+    )
+    assert graph == {'segment:vpc': {'segment:igw'}, 'segment:igw': set()}
+
+    with pytest.raises(UserFriendlyBackendException):
+        manage_stacks_backend.build_graph(['segment:vpc', 'segment:igw'], {'segment:vpc': ['segment:igw']})
+    with pytest.raises(UserFriendlyBackendException):
+        manage_stacks_backend.build_graph(['segment:vpc'], {'segment:vpc': ['segment:nat']})
+    with pytest.raises(UserFriendlyBackendException):
+        manage_stacks_backend.build_graph(['vpc'])
+    with pytest.raises(UserFriendlyBackendException):
+        manage_stacks_backend.build_graph(['container:vpc'])
+    # stack scripts of different levels must be run from different directories
+    with pytest.raises(UserFriendlyBackendException) as info:
+        manage_stacks_backend.build_graph(['account:s3', 'segment:vpc'])
+    assert 'account, segment' in str(info.value)
+
+
+def test_run(generation_dir):
+    script = generation_dir('manageStack.sh', MANAGE_STACK_SCRIPT)
+    order_filename = script.replace('manageStack.sh', 'order')
+    stacks = ['segment:igw', 'segment:vpc', 'segment:baseline']
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = manage_stacks_backend.run(stacks=stacks, log_dir=log_dir)
+        assert [r.returncode for r in results] == [0, 0, 0]
+        with open(order_filename) as f:
+            assert f.read().split() == ['segment:baseline', 'segment:vpc', 'segment:igw']
+
+        results = manage_stacks_backend.run(stacks=stacks, log_dir=log_dir, delete=True)
+        with open(order_filename) as f:
+            assert f.read().split()[3:] == ['segment:igw', 'segment:vpc', 'segment:baseline']
+
+        results = manage_stacks_backend.run(
+            stacks=['segment:baseline', 'segment:bad', 'segment:other'],
+            dependencies={'segment:other': ['segment:bad']},
+            log_dir=log_dir
+        )
+        assert [r.returncode for r in results] == [0, 1, None]
@@ -1,7 +1,12 @@
 import os
+import json
 import shutil
 import tempfile
+import pytest
+from unittest import mock
 from cot.backend.test.generate import run as generate_test_backend
+from cot.backend.test.renderer import testcases_template
+from cot.backend.common.exceptions import UserFriendlyBackendException
 from .conftest import DATA_DIR
 
 
@@ -45,3 +50,99 @@ def test():
             filename = shutil.copy2(filename, os.path.join(dir, os.path.basename(filename)))
             copied_casefiles.append(filename)
         assert generate_test_backend(copied_casefiles, None) == generate_test_backend(directory=dir, output=None)
+
+
+def test_incremental():
+    casefiles = [
+        'secure.testcase.json',
+        'structure-good.testcase.json',
+        'valid-syntax.testcase.json'
+    ]
+    with tempfile.TemporaryDirectory() as dir:
+        copied_casefiles = []
+        for name in casefiles:
+            copied_casefiles.append(shutil.copy2(os.path.join(DATA_DIR, 'testcase', name), os.path.join(dir, name)))
+        output_filename = os.path.join(dir, 'test.py')
+        render_case = testcases_template.render_case
+        with mock.patch.object(testcases_template, 'render_case', wraps=render_case) as render:
+            generate_test_backend(copied_casefiles, output_filename, incremental=True)
+            assert render.call_count == 3
+            with open(output_filename, 'rt') as f:
+                assert f.read() == generate_test_backend(copied_casefiles, None)
+            render.reset_mock()
+
+            generate_test_backend(copied_casefiles, output_filename, incremental=True)
+            assert render.call_count == 0
+
+            with open(copied_casefiles[0], 'wt') as f:
+                json.dump({'secureChanged': {'filename': '/path/to/template.json'}}, f)
+            generate_test_backend(copied_casefiles, output_filename, incremental=True)
+            assert render.call_count == 1
+        with open(output_filename, 'rt') as f:
+            file_text = f.read()
+        assert file_text == generate_test_backend(copied_casefiles, None)
+        assert "test_secureChanged():" in file_text
+        assert "test_secure():" not in file_text
+
+
+def test_streaming():
+    with tempfile.TemporaryDirectory() as dir:
+        casefiles = []
+        for index in range(3):
+            filename = os.path.join(dir, 'cases%s.testcase.json' % index)
+            with open(filename, 'wt') as f:
+                json.dump(
+                    {
+                        'case%s%s' % (case_index, index): {'filename': '/path/to/template%s.json' % case_index}
+                        for case_index in range(100)
+                    },
+                    f
+                )
+            casefiles.append(filename)
+        output_filename = os.path.join(dir, 'test.py')
+        with mock.patch.object(testcases_template, 'render_case') as render:
+            generate_test_backend(casefiles, output_filename)
+            # testcases are rendered into spool file instead of memory
+            assert render.call_count == 0
+        with open(output_filename, 'rt') as f:
+            file_text = f.read()
+        assert file_text == generate_test_backend(casefiles, None)
+        casenames = sorted('case%s%s' % (case_index, index) for case_index in range(100) for index in range(3))
+        positions = [file_text.index('def test_%s():' % casename) for casename in casenames]
+        assert positions == sorted(positions)
+
+
+def test_duplicates():
+    with tempfile.TemporaryDirectory() as dir:
+        first = os.path.join(dir, 'first.testcase.json')
+        second = os.path.join(dir, 'second.testcase.json')
+        with open(first, 'wt') as f:
+            f.write(
+                '{\n'
+                '    "unique": {"filename": "/path/to/template.json"},\n'
+                '    "duplicate": {\n'
+                '        "filename": "/path/to/template.json"\n'
+                '    },\n'
+                '    "duplicate": {"filename": "/path/to/template.json"}\n'
+                '}\n'
+            )
+        with open(second, 'wt') as f:
+            f.write(
+                '{\n'
+                '    "second": {"filename": "/path/to/template.json", "unique": 1},\n'
+                '    "unique": {"filename": "/path/to/template.json"}\n'
+                '}\n'
+            )
+        with pytest.raises(UserFriendlyBackendException) as error:
+            generate_test_backend([first, second], None)
+        assert str(error.value) == (
+            'Duplicate testcase names:\n'
+            '    duplicate: %s:3, %s:6\n'
+            '    unique: %s:2, %s:3'
+        ) % (first, first, first, second)
+        output_filename = os.path.join(dir, 'test.py')
+        generate_test_backend([second], output_filename, incremental=True)
+        # locations of the cached testcases are taken from manifest
+        with pytest.raises(UserFriendlyBackendException) as error:
+            generate_test_backend([second, first], output_filename, incremental=True)
+        assert '    unique: %s:3, %s:2' % (second, first) in str(error.value)
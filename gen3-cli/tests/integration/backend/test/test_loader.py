@@ -0,0 +1,34 @@
+import os
+import glob
+import tempfile
+from unittest import mock
+from jinja2 import Environment, ModuleLoader
+from cot.backend.test import loader
+from cot.backend.test.renderer import testcases_template
+from .conftest import DATA_DIR
+
+
+def test_precompiled_templates():
+    casefiles = sorted(glob.glob(os.path.join(DATA_DIR, 'testcase', '*.testcase.json')))
+    with tempfile.TemporaryDirectory() as dir:
+        assert not loader.is_precompiled(dir)
+        loader.compile_templates(dir)
+        assert loader.is_precompiled(dir)
+        precompiled = Environment(loader=ModuleLoader(dir), **loader.ENVIRONMENT_OPTIONS)
+        from cot.backend.test.generate import run as generate_test_backend
+        text = generate_test_backend(casefiles, None)
+        with mock.patch.object(testcases_template, 'loader', precompiled):
+            assert generate_test_backend(casefiles, None) == text
+        with mock.patch.object(loader, 'templates_digest', return_value='changed'):
+            assert not loader.is_precompiled(dir)
+
+
+def test_bytecode_cache():
+    with tempfile.TemporaryDirectory() as dir:
+        environment = Environment(
+            loader=loader.FileSystemLoader(loader.TEMPLATES_DIR),
+            bytecode_cache=loader.create_bytecode_cache(dir),
+            **loader.ENVIRONMENT_OPTIONS
+        )
+        environment.get_template('test_template_base.py.tmpl')
+        assert os.listdir(dir)
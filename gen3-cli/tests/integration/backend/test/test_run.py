@@ -1,10 +1,26 @@
 import os
+import csv
+import json
+import stat
 import tempfile
+import pytest
+from unittest import mock
+from cot.backend.test import shard
 from cot.backend.test.run import run as run_test_backend
 from cot.backend.test.generate import run as generate_test_backend
 from .conftest import DATA_DIR
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Isolated results cache, generated tests must not depend on the results cached by earlier runs
+    """
+    dir = str(tmp_path / 'cache')
+    monkeypatch.setenv('COT_CACHE_DIR', dir)
+    return dir
+
+
 def test():
     with tempfile.TemporaryDirectory() as dir:
         output_filename = os.path.join(dir, 'test.py')
@@ -26,3 +42,124 @@ def test():
         assert run_test_backend([output_filename])
         generate_test_backend([testcase_filename('structure-bad.testcase.json')], output_filename)
         assert not run_test_backend([output_filename])
+
+
+def test_usage_error():
+    with pytest.raises(Exception) as info:
+        run_test_backend(['--cot-missing-option'])
+    assert 'unrecognized arguments: --cot-missing-option' in str(info.value)
+
+
+def test_workers():
+    with tempfile.TemporaryDirectory() as dir:
+        output_filename = os.path.join(dir, 'test.py')
+        with open(output_filename, 'wt') as f:
+            for i in range(10):
+                f.write('def test_%s():\n    assert True\n\n\n' % i)
+        assert run_test_backend([output_filename], workers=3)
+        with open(output_filename, 'at') as f:
+            f.write('def test_failed():\n    assert False\n')
+        assert not run_test_backend([output_filename], workers=3)
+        with open(output_filename, 'at') as f:
+            f.write('def test_syntax_error(:\n')
+        with pytest.raises(Exception):
+            run_test_backend([output_filename], workers=3)
+
+
+def test_workers_plugin_error():
+    with tempfile.TemporaryDirectory() as dir:
+        output_filename = os.path.join(dir, 'test.py')
+        with open(output_filename, 'wt') as f:
+            f.write('def test():\n    assert True\n')
+        # not importable plugin is an error, not a test failure
+        with mock.patch.object(shard, '__name__', 'cot_missing_plugin'):
+            with pytest.raises(Exception) as info:
+                run_test_backend([output_filename], workers=2)
+        assert 'cot_missing_plugin' in str(info.value)
+
+
+def test_profile():
+    with tempfile.TemporaryDirectory() as dir:
+        casefilename = os.path.join(dir, 'structure.testcase.json')
+        with open(casefilename, 'wt') as f:
+            json.dump(
+                {
+                    'structure%s' % i: {
+                        'filename': os.path.join(DATA_DIR, 'cf', 'valid-syntax.json'),
+                        'no_lint': True,
+                        'no_vulnerability_check': True,
+                        'structure': {
+                            'exists': ['Resources'],
+                            'length': [['Parameters.Environment.AllowedValues', 2]]
+                        }
+                    }
+                    for i in range(2)
+                },
+                f
+            )
+        test_filename = os.path.join(dir, 'test_structure.py')
+        generate_test_backend([casefilename], test_filename)
+        for workers in [1, 2]:
+            json_filename = os.path.join(dir, 'profile.json')
+            assert run_test_backend([test_filename], workers=workers, profile=json_filename)
+            with open(json_filename, 'rt') as f:
+                report = json.load(f)
+            assert sorted((record['kind'], record['name']) for record in report['records']) == [
+                ('parse', None),
+                ('parse', None),
+                ('rule', 'Parameters.Environment.AllowedValues.length == 2'),
+                ('rule', 'Parameters.Environment.AllowedValues.length == 2'),
+                ('rule', 'Resources exists?'),
+                ('rule', 'Resources exists?')
+            ]
+            assert sorted(record['testcase'].split('::')[1] for record in report['records']) == [
+                'test_structure0', 'test_structure0', 'test_structure0',
+                'test_structure1', 'test_structure1', 'test_structure1'
+            ]
+            assert [template['template'] for template in report['templates']] == [
+                os.path.join(DATA_DIR, 'cf', 'valid-syntax.json')
+            ]
+        csv_filename = os.path.join(dir, 'profile.csv')
+        assert run_test_backend([test_filename], profile=csv_filename)
+        with open(csv_filename, 'rt') as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 6
+        assert set(rows[0]) == {'testcase', 'template', 'kind', 'name', 'duration'}
+
+
+def test_cached_lint_result(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    calls_filename = str(tmp_path / 'calls')
+    lint = bin_dir / 'cfn-lint'
+    lint.write_text(
+        '#!/bin/bash\n'
+        '[[ "$1" == "--version" ]] && { echo "cfn-lint 0.0.0"; exit 0; }\n'
+        'echo "$@" >> %s\n'
+        'echo "[]"\n' % calls_filename
+    )
+    lint.chmod(lint.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', '%s%s%s' % (bin_dir, os.pathsep, os.environ['PATH']))
+    casefilename = str(tmp_path / 'lint.testcase.json')
+    with open(casefilename, 'wt') as f:
+        json.dump(
+            {
+                'lint': {
+                    'filename': os.path.join(DATA_DIR, 'cf', 'valid-syntax.json'),
+                    'no_vulnerability_check': True
+                }
+            },
+            f
+        )
+    test_filename = str(tmp_path / 'test_lint.py')
+    generate_test_backend([casefilename], test_filename)
+    assert run_test_backend([test_filename])
+    with open(calls_filename, 'rt') as f:
+        assert len(f.readlines()) == 1
+    # cache hit skips the lint call
+    assert run_test_backend([test_filename])
+    with open(calls_filename, 'rt') as f:
+        assert len(f.readlines()) == 1
+    assert run_test_backend([test_filename], no_cache=True)
+    with open(calls_filename, 'rt') as f:
+        assert len(f.readlines()) == 2
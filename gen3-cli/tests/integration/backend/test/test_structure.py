@@ -0,0 +1,20 @@
+import os
+from cot.backend.test.structure import run as structure_test_backend
+from .conftest import DATA_DIR
+
+
+def test():
+    casefiles = [
+        os.path.join(DATA_DIR, 'testcase', name)
+        for name in ('structure-good.testcase.json', 'structure-bad.testcase.json', 'secure.testcase.json')
+    ]
+    results = dict(structure_test_backend(casefiles))
+    # testcases without structure rules are not checked
+    assert sorted(results) == ['structureBad', 'structureGood']
+    assert results['structureGood'] == []
+    assert sorted(error['rule'] for error in results['structureBad']) == [
+        'Parameters.Environment.AllowedValues.length == 10',
+        'Parameters.Environment.AllowedValues[0] == Test',
+        'Parameters.Environment.AllowedValues[3] exists?'
+    ]
+    assert dict(structure_test_backend(directory=os.path.join(DATA_DIR, 'testcase'))).keys() == results.keys()
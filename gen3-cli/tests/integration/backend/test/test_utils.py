@@ -1,27 +1,174 @@
 import os
+import sys
+import json
 import tempfile
+import subprocess
+from unittest import mock
 import pytest
 from cot.backend.test.templates.cf_structure_obj_block import (
     Structure,
+    TemplateCache,
     structure_test
 )
-from cot.backend.test.templates.cf_test_lint_func_block import lint_test
-from cot.backend.test.templates.cf_test_vulnerability_func_block import vulnerability_test
+from cot.backend.test.templates.cf_test_lint_func_block import (
+    lint_test,
+    lint_batch,
+    LINT_CMD,
+    LINT_BATCH_SIZE
+)
+from cot.backend.test.templates.cf_test_cache_block import ResultCache
+from cot.backend.test.templates.cf_test_batch_block import BatchCheck
+from cot.backend.test.templates.cf_test_shard_block import shard_filenames
+from cot.backend.test import shard
+from cot.backend.test.templates import cf_test_vulnerability_func_block
+from cot.backend.test.templates.cf_test_vulnerability_func_block import (
+    vulnerability_test,
+    vulnerability_batch,
+    VULNERABILITY_BATCH_SIZE
+)
 from .conftest import DATA_DIR
 
 CF_TEMPLATES_PATH = os.path.join(DATA_DIR, 'cf')
 
 
+def lint_check(batch=None, cache=None):
+    return BatchCheck('lint', lint_batch, LINT_BATCH_SIZE, batch, cache)
+
+
+def vulnerability_check(batch=None):
+    return BatchCheck('vulnerability', vulnerability_batch, VULNERABILITY_BATCH_SIZE, batch)
+
+
 def test_vulnerability_test():
-    vulnerability_test(os.path.join(CF_TEMPLATES_PATH, 'secure.json'))
+    vulnerability_test(os.path.join(CF_TEMPLATES_PATH, 'secure.json'), vulnerability_check())
     with pytest.raises(AssertionError):
-        vulnerability_test(os.path.join(CF_TEMPLATES_PATH, 'insecure.json'))
+        vulnerability_test(os.path.join(CF_TEMPLATES_PATH, 'insecure.json'), vulnerability_check())
+
+
+# cfn_nag_scan replacement reporting FAIL violation for "insecure" templates and WARN for the others
+FAKE_VULNERABILITY_SCRIPT = """
+import os
+import sys
+import json
+dir = sys.argv[sys.argv.index('--input-path') + 1]
+results = []
+for name in sorted(os.listdir(dir)):
+    type = 'FAIL' if 'insecure' in name else 'WARN'
+    results.append({
+        'filename': os.path.join(dir, name),
+        'file_results': {'failure_count': 0, 'violations': [{'id': 'F1', 'type': type}]}
+    })
+print(json.dumps(results))
+"""
+
+
+def test_vulnerability_test_batch():
+    secure = os.path.join(CF_TEMPLATES_PATH, 'secure.json')
+    insecure = os.path.join(CF_TEMPLATES_PATH, 'insecure.json')
+    with tempfile.TemporaryDirectory() as dir:
+        script = os.path.join(dir, 'cfn_nag_scan.py')
+        with open(script, 'wt') as f:
+            f.write(FAKE_VULNERABILITY_SCRIPT)
+        cmd = [sys.executable, script]
+        with mock.patch.object(cf_test_vulnerability_func_block, 'VULNERABILITY_CMD', cmd):
+            results = vulnerability_check().check([secure, insecure, secure])
+            assert results == {
+                os.path.normpath(secure): [{'id': 'F1', 'type': 'WARN'}],
+                os.path.normpath(insecure): [{'id': 'F1', 'type': 'FAIL'}]
+            }
+            check = vulnerability_check([secure, insecure])
+            with mock.patch('subprocess.run', wraps=subprocess.run) as run:
+                # WARN violations are ignored
+                vulnerability_test(secure, check)
+                with pytest.raises(AssertionError):
+                    vulnerability_test(insecure, check)
+                assert run.call_count == 1
 
 
 def test_lint_test():
-    lint_test(os.path.join(CF_TEMPLATES_PATH, 'valid-syntax.json'))
+    lint_test(os.path.join(CF_TEMPLATES_PATH, 'valid-syntax.json'), lint_check())
     with pytest.raises(AssertionError):
-        lint_test(os.path.join(CF_TEMPLATES_PATH, 'invalid-syntax.json'))
+        lint_test(os.path.join(CF_TEMPLATES_PATH, 'invalid-syntax.json'), lint_check())
+
+
+def test_lint_test_batch():
+    valid = os.path.join(CF_TEMPLATES_PATH, 'valid-syntax.json')
+    invalid = os.path.join(CF_TEMPLATES_PATH, 'invalid-syntax.json')
+    check = lint_check([valid, invalid])
+    with mock.patch('subprocess.run', wraps=subprocess.run) as run:
+        lint_test(valid, check)
+        with pytest.raises(AssertionError):
+            lint_test(invalid, check)
+        assert run.call_count == 1
+
+
+def test_batch_check():
+    checked = []
+
+    def check_batch(filenames):
+        checked.append(list(filenames))
+        if 'broken' in filenames:
+            raise Exception('broken')
+        return {filename: [filename] for filename in filenames}
+
+    check = BatchCheck('fake', check_batch, 2, ['a', 'b', 'c'])
+    assert check.errors('b') == ['b']
+    assert check.errors('a') == ['a']
+    assert check.errors('c') == ['c']
+    assert checked == [['b', 'a'], ['c']]
+    # one broken file does not fail the others
+    check = BatchCheck('fake', check_batch, 2, ['a', 'broken', 'b', 'c'])
+    del checked[:]
+    assert check.errors('a') == ['a']
+    with pytest.raises(Exception):
+        check.errors('broken')
+    assert check.errors('b') == ['b']
+    assert check.errors('c') == ['c']
+    # failed batch is not checked again, the next files are checked one by one
+    assert checked == [['a', 'broken'], ['a'], ['broken'], ['b'], ['c']]
+
+
+def test_result_cache():
+    valid = os.path.join(CF_TEMPLATES_PATH, 'valid-syntax.json')
+    invalid = os.path.join(CF_TEMPLATES_PATH, 'invalid-syntax.json')
+    with tempfile.TemporaryDirectory() as dir:
+        with mock.patch.dict('os.environ', {'COT_CACHE_DIR': dir}):
+            cache = ResultCache('cfn-lint', LINT_CMD)
+            results = lint_check(cache=cache).check([valid, invalid])
+            assert len(os.listdir(cache.dir)) == 2
+            with mock.patch('subprocess.run') as run:
+                assert lint_check(cache=cache).check([valid, invalid]) == results
+                assert run.call_count == 0
+            # copy of a template is linted by content
+            copy = os.path.join(dir, 'copy.json')
+            with open(invalid, 'rt') as src, open(copy, 'wt') as dst:
+                dst.write(src.read())
+            with mock.patch('subprocess.run') as run:
+                with pytest.raises(AssertionError) as info:
+                    lint_test(copy, lint_check(cache=cache))
+                errors = json.loads(str(info.value))
+                assert errors and all(error['Filename'] == copy for error in errors)
+                assert run.call_count == 0
+            # least recently used result evicted
+            max_size = max(os.path.getsize(os.path.join(cache.dir, name)) for name in os.listdir(cache.dir))
+            cache.size_limit = int(max_size / 0.8) + 1
+            cache.evict()
+            assert len(os.listdir(cache.dir)) == 1
+        with mock.patch.dict('os.environ', {'COT_CACHE_DIR': dir, 'COT_TEST_NO_CACHE': '1'}):
+            cache = ResultCache('cfn-lint', LINT_CMD)
+            assert cache.get(valid) == (None, None)
+
+
+def test_shard_filenames():
+    tests = dict(('test_%s' % i, 'template%s.json' % (i % 5)) for i in range(20))
+    assert shard_filenames(tests) == ['template%s.json' % i for i in range(5)]
+    for index in range(3):
+        with mock.patch.dict('os.environ', {shard.SHARD_ENV: shard.format_shard(index, 3)}):
+            expected = []
+            for name, filename in tests.items():
+                if shard.in_shard(name, index, 3) and filename not in expected:
+                    expected.append(filename)
+            assert shard_filenames(tests) == expected
 
 
 def test_structure_object():
@@ -105,6 +252,150 @@ def test_structure_object():
     assert len(template.errors) == 3
 
 
+def test_structure_apply():
+    body = {
+        'Parameters': {
+            'Count': {'Default': 5},
+            'Names': {'Default': ['a', 'b']}
+        },
+        Structure.RESOURCES_KEY: {
+            'TestResource': {
+                Structure.RESOURCE_TYPE_KEY: 'TestType'
+            }
+        },
+        Structure.OUTPUT_KEY: {
+            'TestOutput': {}
+        }
+    }
+    rules = {
+        'exists': ['Parameters.Count'],
+        'match': [
+            # strings containing JSON are compared as parsed values
+            ['Parameters.Count.Default', '5'],
+            ['Parameters.Names.Default', ['a', 'b']],
+            ['Parameters.Names.Default[0]', 'a']
+        ],
+        'resource': [['TestResource', 'TestType']],
+        'output': ['TestOutput'],
+        'not_empty': ['Parameters.Names.Default'],
+        'length': [['Parameters.Names.Default', 2]]
+    }
+    assert not Structure(body).apply(rules).errors
+    rules = {
+        'exists': ['Parameters.Missing'],
+        'match': [['Parameters.Names.Default[1]', 'a']],
+        'resource': [['TestResource', 'WrongType']],
+        'output': ['Missing'],
+        'not_empty': ['Parameters.Missing'],
+        'length': [['Parameters.Names.Default', 3]]
+    }
+    assert len(Structure(body).apply(rules).errors) == 6
+
+
+def test_structure_resources():
+    body = {
+        Structure.RESOURCES_KEY: {
+            'Resource%s' % index: {
+                Structure.RESOURCE_TYPE_KEY: 'Type%s' % index
+            }
+            for index in range(100)
+        }
+    }
+    types = {
+        'Resource%s' % index: 'Type%s' % index
+        for index in range(100)
+    }
+    assert not Structure(body).resources(types).errors
+    assert not Structure(body).apply({'resources': types}).errors
+    types['Resource1'] = 'WrongType'
+    types['Missing'] = 'Type'
+    # all mismatches are reported by a single rule
+    errors = Structure(body).apply({'resources': types}).errors
+    assert errors == [
+        {
+            'rule': '101 resources Type match',
+            'msg': 'resources mismatch: Resource1.Type[Type1]!=WrongType, Missing is missing'
+        }
+    ]
+
+
+def test_structure_wildcards():
+    body = {
+        Structure.RESOURCES_KEY: {
+            'BucketA': {
+                Structure.RESOURCE_TYPE_KEY: 'AWS::S3::Bucket',
+                'Properties': {'Tags': [{'Key': 'a'}, {'Key': 'b'}]}
+            },
+            'BucketB': {
+                Structure.RESOURCE_TYPE_KEY: 'AWS::S3::Bucket',
+                'Properties': {'Tags': [{'Key': 'a'}]}
+            },
+            'Instance': {
+                Structure.RESOURCE_TYPE_KEY: 'AWS::EC2::Instance',
+                'Properties': {}
+            }
+        }
+    }
+    assert Structure.compile_path('Resources.*.Properties.Tags[*].Key') == (
+        'Resources', Structure.WILDCARD, 'Properties', 'Tags', Structure.WILDCARD, 'Key'
+    )
+    assert Structure.compile_path('Resources.{AWS::S3::Bucket}.Properties') == (
+        'Resources', (Structure.TYPE_FILTER, 'AWS::S3::Bucket'), 'Properties'
+    )
+    template = Structure(body)
+    template.exists('Resources.*.Properties')
+    template.exists('Resources.{AWS::S3::Bucket}.Properties.Tags[*].Key')
+    template.not_empty('Resources.{AWS::S3::Bucket}.Properties.Tags')
+    template.match('Resources.{AWS::S3::Bucket}.Properties.Tags[0].Key', 'a')
+    template.len('Resources.{AWS::EC2::Instance}.Properties', 0)
+    assert not template.errors
+
+    template = Structure(body)
+    template.exists('Resources.*.Properties.Tags')
+    template.len('Resources.{AWS::S3::Bucket}.Properties.Tags', 2)
+    template.match('Resources.{AWS::S3::Bucket}.Properties.Tags[*].Key', 'a')
+    # nothing matched
+    template.exists('Resources.{AWS::S3::Missing}.Properties')
+    assert [error['msg'] for error in template.errors] == [
+        'Resources.Instance.Properties.Tags does not exist',
+        'Resources.BucketB.Properties.Tags.length[1]!=2',
+        'Resources.BucketA.Properties.Tags[1].Key doesn\'t match a',
+        'Resources.{AWS::S3::Missing}.Properties does not exist'
+    ]
+
+
+def test_structure_paths():
+    lookups = []
+
+    class CountingDict(dict):
+        def __getitem__(self, key):
+            lookups.append(key)
+            return super().__getitem__(key)
+
+    body = CountingDict(
+        Resources=CountingDict(
+            Bucket=CountingDict(
+                Properties=CountingDict(Name='name', Tags=[1, 2])
+            )
+        )
+    )
+    assert Structure.compile_path('Resources.Bucket.Properties.Tags[1]') == (
+        'Resources', 'Bucket', 'Properties', 'Tags', 1
+    )
+    assert Structure.compile_path('Resources.Bucket.Properties.Tags[1]') is Structure.compile_path(
+        'Resources.Bucket.Properties.Tags[1]'
+    )
+    template = Structure(body)
+    template.match('Resources.Bucket.Properties.Name', 'name')
+    template.len('Resources.Bucket.Properties.Tags', 2)
+    template.exists('Resources.Bucket.Properties.Tags[1]')
+    template.exists('Resources.Bucket.Properties.Missing')
+    assert len(template.errors) == 1
+    assert template.errors[0]['msg'] == 'Resources.Bucket.Properties.Missing does not exist'
+    # common prefix resolved once
+    assert lookups == ['Resources', 'Bucket', 'Properties', 'Name', 'Tags', 'Missing']
+
+
 def test_structure_test():
     structure = structure_test(os.path.join(CF_TEMPLATES_PATH, 'valid-syntax.json'))
     structure.output("DOES NOT EXITS")
@@ -122,3 +413,32 @@ def test_structure_test():
     structure = structure_test(os.path.join(CF_TEMPLATES_PATH, 'valid-syntax.json'))
     structure.exists('Resources')
     structure.assert_structure()
+
+
+def test_template_cache():
+    with tempfile.TemporaryDirectory() as dir:
+        filenames = []
+        for i in range(3):
+            filename = os.path.join(dir, '%s.json' % i)
+            with open(filename, 'wt') as f:
+                f.write('{"Resources": {"R%s": {}}}' % i)
+            filenames.append(filename)
+        size = os.path.getsize(filenames[0])
+        cache = TemplateCache(size * 2)
+        with mock.patch('json.load', wraps=json.load) as load:
+            assert cache.load(filenames[0]) is cache.load(filenames[0])
+            assert load.call_count == 1
+            cache.load(filenames[1])
+            cache.load(filenames[0])
+            # least recently used template is evicted
+            cache.load(filenames[2])
+            assert load.call_count == 3
+            cache.load(filenames[0])
+            assert load.call_count == 3
+            cache.load(filenames[1])
+            assert load.call_count == 4
+            # changed template is parsed again
+            with open(filenames[1], 'wt') as f:
+                f.write('{"Resources": {"Changed": {}}}')
+            assert cache.load(filenames[1]) == {'Resources': {'Changed': {}}}
+            assert load.call_count == 5
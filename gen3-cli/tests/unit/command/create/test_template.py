@@ -1,3 +1,4 @@
+import os
 import collections
 from unittest import mock
 from click.testing import CliRunner
@@ -5,6 +6,12 @@ from cot.command.create.template import template as create_template
 from tests.unit.command.test_option_generation import run_options_test, run_validatable_option_test
 
 
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', 'data', 'unit', 'command', 'create'
+)
+
+
 ALL_VALID_OPTIONS = collections.OrderedDict()
 
 ALL_VALID_OPTIONS['!-u,--deployment-unit'] = 'deployment_unit'
@@ -25,6 +32,10 @@ ALL_VALID_OPTIONS['-f,--generation-framework'] = 'generation_framework'
 ALL_VALID_OPTIONS['-t,--generation-testcase'] = 'generation_testcase'
 ALL_VALID_OPTIONS['-s,--generation-scenarios'] = 'generation_scenarios'
 ALL_VALID_OPTIONS['-i,--generation-input-source'] = 'generation_input_source'
+ALL_VALID_OPTIONS['--deployment-unit-file'] = os.path.join(DATA_DIR, 'no-deployment-units.txt')
+ALL_VALID_OPTIONS['--workers'] = 2
+ALL_VALID_OPTIONS['--timeout'] = 60
+ALL_VALID_OPTIONS['--log-dir'] = 'log_dir'
 
 
 @mock.patch('cot.command.create.template.create_template_backend')
@@ -47,3 +58,25 @@ def test_input_validation(create_template_backend):
             ('-l', 'badlevelvalue', 'account')
         ]
     )
+
+
+@mock.patch('cot.command.create.template.create_template_backend')
+def test_multiple_units(create_template_backend):
+    runner = CliRunner()
+    result = runner.invoke(create_template, ['-l', 'segment'])
+    assert result.exit_code == 2, result.output
+    create_template_backend.run_units.return_value = []
+    result = runner.invoke(
+        create_template,
+        [
+            '-l', 'segment',
+            '-u', 'cmk',
+            '--deployment-unit-file', os.path.join(DATA_DIR, 'deployment-units.txt'),
+            '--workers', '2'
+        ]
+    )
+    assert result.exit_code == 0, result.output
+    assert create_template_backend.run.call_count == 0
+    kwargs = create_template_backend.run_units.call_args[1]
+    assert kwargs['deployment_units'] == ['cmk', 'baseline', 'vpc', 'igw']
+    assert kwargs['workers'] == 2
@@ -0,0 +1,55 @@
+import collections
+from unittest import mock
+from click.testing import CliRunner
+from cot.command.manage.stacks import stacks as manage_stacks
+from tests.unit.command.test_option_generation import run_options_test, run_validatable_option_test
+
+
+ALL_VALID_OPTIONS = collections.OrderedDict()
+ALL_VALID_OPTIONS['!-s,--stack'] = 'segment:vpc'
+ALL_VALID_OPTIONS['-a,--after'] = 'segment:vpc=segment:baseline'
+ALL_VALID_OPTIONS['--no-default-dependencies'] = [True, False]
+ALL_VALID_OPTIONS['-d,--delete'] = [True, False]
+ALL_VALID_OPTIONS['-w,--stack-wait'] = 10
+ALL_VALID_OPTIONS['-r,--region'] = 'region'
+ALL_VALID_OPTIONS['-y,--dryrun'] = [True, False]
+ALL_VALID_OPTIONS['--workers'] = 2
+ALL_VALID_OPTIONS['--timeout'] = 60
+ALL_VALID_OPTIONS['--log-dir'] = 'log_dir'
+
+
+@mock.patch('cot.command.manage.stacks.manage_stacks_backend')
+def test_input_valid(manage_stacks_backend):
+    manage_stacks_backend.run.return_value = []
+    run_options_test(CliRunner(), manage_stacks, ALL_VALID_OPTIONS, manage_stacks_backend.run)
+
+
+@mock.patch('cot.command.manage.stacks.manage_stacks_backend')
+def test_input_validation(manage_stacks_backend):
+    manage_stacks_backend.run.return_value = []
+    runner = CliRunner()
+    run_validatable_option_test(
+        runner,
+        manage_stacks,
+        manage_stacks_backend.run,
+        {
+            '-s': 'segment:vpc'
+        },
+        [
+            ('-a', 'segment:igw', 'segment:igw=segment:vpc,segment:baseline'),
+            ('-w', 'not_an_int', 10),
+            ('--workers', 0, 1),
+            ('--timeout', 0, 60)
+        ]
+    )
+    runner.invoke(
+        manage_stacks,
+        [
+            '-s', 'segment:igw',
+            '-a', 'segment:igw=segment:vpc',
+            '-a', 'segment:igw=segment:baseline'
+        ]
+    )
+    assert manage_stacks_backend.run.call_args[1]['dependencies'] == {
+        'segment:igw': ['segment:vpc', 'segment:baseline']
+    }
@@ -0,0 +1,70 @@
+"""
+Shell completion runs cot on every TAB, therefore command invocation
+must import only the modules of the invoked command.
+"""
+import os
+import sys
+import json
+import time
+import subprocess
+import pytest
+
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+# seconds, generous enough to be stable on slow CI machines
+STARTUP_TIME_BUDGET = 2.0
+HEAVY_MODULES = [
+    'cookiecutter',
+    'jinja2',
+    'tabulate',
+    'pytest'
+]
+SCRIPT = """
+import sys
+import json
+from cot import command
+try:
+    command.root(%s)
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps(sorted(sys.modules)))
+"""
+
+
+def invoke(*args):
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, '-c', SCRIPT % repr(list(args))],
+        cwd=ROOT_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding='utf8'
+    )
+    return time.monotonic() - started, set(json.loads(result.stderr)), result.stdout
+
+
+def test_startup():
+    elapsed, modules, output = invoke('manage', 'stack', '--help')
+    assert 'Manage a CloudFormation stack' in output
+    for name in HEAVY_MODULES:
+        assert name not in modules
+    assert 'cot.command.manage.stack' in modules
+    assert 'cot.command.manage.crypto' not in modules
+    assert 'cot.command.create' not in modules
+
+
+def test_group_help_lists_lazy_commands():
+    elapsed, modules, output = invoke('--help')
+    for name in ['create', 'generate', 'manage', 'run', 'test']:
+        assert name in output
+    assert 'cot.command.manage.stack' not in modules
+    elapsed, modules, output = invoke('manage', '--help')
+    for name in ['stack', 'stacks', 'deployment', 'crypto', 'file-crypto', 'credential-crypto']:
+        assert name in output
+
+
+@pytest.mark.benchmark
+def test_startup_time():
+    elapsed, modules, output = invoke('manage', 'stack', '--help')
+    assert 'Manage a CloudFormation stack' in output
+    assert elapsed < STARTUP_TIME_BUDGET
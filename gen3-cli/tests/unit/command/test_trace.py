@@ -0,0 +1,32 @@
+import json
+from unittest import mock
+from click.testing import CliRunner
+from cot.command import root
+from cot.command.create import group as create_group
+
+
+@mock.patch('cot.command.create.reference.create_reference_backend')
+def test_trace(create_reference_backend):
+    runner = CliRunner()
+    # command imported by the previous invocations is not imported again
+    with runner.isolated_filesystem(), mock.patch.dict(create_group.commands, clear=True):
+        result = runner.invoke(root, ['--trace', 'trace.json', 'create', 'reference', '-t', 'type'])
+        assert result.exit_code == 0, result.output
+        assert create_reference_backend.run.call_count == 1
+        with open('trace.json', 'rt') as f:
+            events = json.load(f)['traceEvents']
+    spans = {event['name']: event for event in events if event['ph'] == 'X'}
+    assert spans['startup']['cat'] == 'startup'
+    assert spans['dispatch root']['cat'] == 'dispatch'
+    assert spans['dispatch root create']['cat'] == 'dispatch'
+    assert spans['import cot.command.create.reference']['cat'] == 'import'
+    assert any(event['name'] == 'thread_name' for event in events if event['ph'] == 'M')
+
+
+def test_trace_is_written_on_failure():
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(root, ['--trace', 'trace.json', 'create', 'reference'])
+        assert result.exit_code != 0
+        with open('trace.json', 'rt') as f:
+            assert json.load(f)['traceEvents']